@@ -17,50 +17,362 @@ Hard stops (any one fails):
 - Removes student agency
 """
 
+import asyncio
+import contextlib
 import json
 import os
 from pathlib import Path
-from typing import Dict, Tuple
-from dataclasses import dataclass
-
-from openai import OpenAI
-
-
-@dataclass
+from collections import Counter
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from dataclasses import dataclass, replace
+
+import aiofiles
+from openai import AsyncOpenAI
+
+from llm_client import ChatClient
+from loaders import iter_matrix_files
+import serialization
+from openai_batch import batch_request, run_batch
+from rubric_cache import RubricCache
+from rubric_prefilter import RubricPrefilter
+
+
+PROMPTS_DIR = Path(__file__).parent / "prompts"
+RUBRIC_VERSION = "rubric_v1"
+
+# Invariant rubric instructions, read once at import. Sent as the system
+# message so every request shares a byte-identical prefix and hits the
+# provider's prompt cache; only the dialogue itself varies (RUBRIC_USER_TEMPLATE).
+RUBRIC_SYSTEM_PROMPT = (PROMPTS_DIR / f"{RUBRIC_VERSION}.txt").read_text(encoding="utf-8")
+
+HARD_STOP_KEYS = ("shaming", "complete_answer", "emotional_dismissal", "agency_removal")
+
+PASS_CRITERIA_KEYS = (
+    "asks_not_tells",
+    "open_ended",
+    "agency",
+    "references_specific",
+    "emotional_aware",
+    "visible_progress",
+    "pushback_safe",
+)
+
+
+def _strict_object(properties: dict) -> dict:
+    """JSON schema object with every property required (strict mode)."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+RUBRIC_SCHEMA = _strict_object({
+    "hard_stops": _strict_object({key: {"type": "boolean"} for key in HARD_STOP_KEYS}),
+    "pass_criteria": _strict_object({
+        key: _strict_object({"pass": {"type": "boolean"}, "reason": {"type": "string"}})
+        for key in PASS_CRITERIA_KEYS
+    }),
+    "overall": _strict_object({
+        "pass": {"type": "boolean"},
+        "confidence": {"type": "number"},
+        "reasoning": {"type": "string"},
+    }),
+})
+
+RUBRIC_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "rubric_evaluation", "strict": True, "schema": RUBRIC_SCHEMA},
+}
+
+# The file's trailing newline isn't part of the template
+RUBRIC_USER_TEMPLATE = (PROMPTS_DIR / f"{RUBRIC_VERSION}_user.txt").read_text(encoding="utf-8").rstrip("\n")
+
+
+# RubricScore.flags bits: pass criteria, then hard stops (set = OK)
+ASKS_NOT_TELLS = 1 << 0
+OPEN_ENDED = 1 << 1
+AGENCY_PRESERVED = 1 << 2
+REFERENCES_SPECIFIC = 1 << 3
+EMOTIONAL_AWARE = 1 << 4
+VISIBLE_PROGRESS = 1 << 5
+PUSHBACK_SAFE = 1 << 6
+NO_SHAMING = 1 << 7
+NO_COMPLETE_ANSWERS = 1 << 8
+NO_EMOTIONAL_DISMISSAL = 1 << 9
+NO_AGENCY_REMOVAL = 1 << 10
+ALL_FLAGS = (1 << 11) - 1
+
+FLAG_ATTRS = {
+    "asks_not_tells": ASKS_NOT_TELLS,
+    "open_ended": OPEN_ENDED,
+    "agency_preserved": AGENCY_PRESERVED,
+    "references_specific": REFERENCES_SPECIFIC,
+    "emotional_aware": EMOTIONAL_AWARE,
+    "visible_progress": VISIBLE_PROGRESS,
+    "pushback_safe": PUSHBACK_SAFE,
+    "no_shaming": NO_SHAMING,
+    "no_complete_answers": NO_COMPLETE_ANSWERS,
+    "no_emotional_dismissal": NO_EMOTIONAL_DISMISSAL,
+    "no_agency_removal": NO_AGENCY_REMOVAL,
+}
+
+
+def _flag(mask: int) -> property:
+    return property(lambda self: bool(self.flags & mask))
+
+
+@dataclass(slots=True)
 class RubricScore:
-    """Result of binary rubric evaluation."""
+    """Result of binary rubric evaluation.
+
+    Component scores and hard stops are packed into `flags` (see FLAG_ATTRS)
+    and read back through the boolean properties below.
+    """
     dialogue_id: str
-    pass_fail: bool  # True = PASS, False = FAIL
+    flags: int
+
+    # Reasoning
+    reasoning: str
+    confidence: float  # 0-1
 
     # Component scores
-    asks_not_tells: bool
-    open_ended: bool
-    agency_preserved: bool
-    references_specific: bool
-    emotional_aware: bool
-    visible_progress: bool
-    pushback_safe: bool
+    asks_not_tells = _flag(ASKS_NOT_TELLS)
+    open_ended = _flag(OPEN_ENDED)
+    agency_preserved = _flag(AGENCY_PRESERVED)
+    references_specific = _flag(REFERENCES_SPECIFIC)
+    emotional_aware = _flag(EMOTIONAL_AWARE)
+    visible_progress = _flag(VISIBLE_PROGRESS)
+    pushback_safe = _flag(PUSHBACK_SAFE)
 
     # Hard stops
-    no_shaming: bool
-    no_complete_answers: bool
-    no_emotional_dismissal: bool
-    no_agency_removal: bool
+    no_shaming = _flag(NO_SHAMING)
+    no_complete_answers = _flag(NO_COMPLETE_ANSWERS)
+    no_emotional_dismissal = _flag(NO_EMOTIONAL_DISMISSAL)
+    no_agency_removal = _flag(NO_AGENCY_REMOVAL)
+
+    @property
+    def pass_fail(self) -> bool:
+        """True = PASS: every criterion met and no hard stop crossed."""
+        return self.flags == ALL_FLAGS
+
+    def to_dict(self) -> dict:
+        """Flat dict with one boolean per component, for JSON output."""
+        data = {"dialogue_id": self.dialogue_id, "pass_fail": self.pass_fail}
+        data.update({attr: bool(self.flags & mask) for attr, mask in FLAG_ATTRS.items()})
+        data["reasoning"] = self.reasoning
+        data["confidence"] = self.confidence
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RubricScore":
+        """Inverse of to_dict (pass_fail is derived, so it is ignored)."""
+        flags = 0
+        for attr, mask in FLAG_ATTRS.items():
+            if data[attr]:
+                flags |= mask
+        return cls(
+            dialogue_id=data["dialogue_id"],
+            flags=flags,
+            reasoning=data["reasoning"],
+            confidence=data["confidence"],
+        )
+
+
+# (label, RubricScore flag) rows for print_results_summary
+SUMMARY_CRITERIA = [
+    ("Asks_Not_Tells", ASKS_NOT_TELLS),
+    ("Open_Ended", OPEN_ENDED),
+    ("Agency", AGENCY_PRESERVED),
+    ("References_Specific", REFERENCES_SPECIFIC),
+    ("Emotional_Aware", EMOTIONAL_AWARE),
+    ("Visible_Progress", VISIBLE_PROGRESS),
+    ("Pushback_Safe", PUSHBACK_SAFE),
+]
+
+SUMMARY_HARD_STOPS = [
+    ("No Shaming", NO_SHAMING),
+    ("No Complete Answers", NO_COMPLETE_ANSWERS),
+    ("No Emotional Dismissal", NO_EMOTIONAL_DISMISSAL),
+    ("No Agency Removal", NO_AGENCY_REMOVAL),
+]
+
+
+def read_score_log(path: Path) -> Dict[str, RubricScore]:
+    """Load scores from a JSONL score log, keyed by matrix filename.
+
+    A line cut short by a crash mid-write is skipped, so that file is
+    simply scored again on the next run.
+    """
+
+    scores = {}
+    if not path.exists():
+        return scores
+
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = serialization.loads(line)
+                scores[record["file"]] = RubricScore.from_dict(record)
+            except (ValueError, KeyError):
+                continue
+
+    return scores
 
-    # Reasoning
-    reasoning: str
-    confidence: float  # 0-1
+
+def _log_score(log: Optional[BinaryIO], name: str, score: RubricScore):
+    """Append one score to an open JSONL score log (no-op without a log)."""
+    if log is None:
+        return
+    log.write(serialization.dumps({"file": name, **score.to_dict()}) + b"\n")
+    log.flush()
+
+
+def _open_score_log(path: Optional[Path]):
+    """Open a score log for appending, or a no-op context without a path."""
+    if path is None:
+        return contextlib.nullcontext()
+
+    log = open(path, "ab")
+    # Terminate a line left partial by a crash so new records start clean
+    if log.tell() > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                log.write(b"\n")
+    return log
 
 
 class BinaryRubricScorer:
     """Score dialogues against pedagogical rubric."""
 
-    def __init__(self, api_key: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        max_concurrency: int = 32,
+        cache_dir: Optional[str] = "data/.rubric_cache",
+        semantic_threshold: Optional[float] = None,
+        base_url: Optional[str] = None,
+        model: str = "gpt-4o-mini",
+        prefilter: bool = False,
+        rpm_limit: Optional[int] = None,
+        tpm_limit: Optional[int] = None,
+    ):
+        """
+        Args:
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY)
+            max_concurrency: Max rubric calls in flight at once
+            cache_dir: Where to cache scores by dialogue content (None = no cache)
+            semantic_threshold: Also reuse scores of near-duplicate dialogues
+                at this embedding similarity (e.g. 0.97). None = exact only.
+            base_url: OpenAI-compatible endpoint, e.g. a local vLLM server at
+                "http://localhost:8000/v1". None = the OpenAI API. Rubric
+                calls only: embeddings (semantic cache, prefilter) still go
+                to OpenAI with OPENAI_API_KEY.
+            model: Model name as the endpoint knows it
+            prefilter: Settle confident cases with embedding probes trained
+                on cached scores, calling the LLM only for borderline ones.
+                Needs the cache; embeds every uncached dialogue.
+            rpm_limit: Requests per minute to stay under (None = unthrottled)
+            tpm_limit: Tokens per minute to stay under (None = unthrottled)
+        """
         if api_key is None:
-            api_key = os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=api_key)
+            # A local server typically doesn't check the key, but the client needs one
+            api_key = os.getenv("OPENAI_API_KEY") or ("EMPTY" if base_url else None)
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        self.chat = ChatClient(self.client, rpm_limit=rpm_limit, tpm_limit=tpm_limit)
+        self.model = model
+        self.max_concurrency = max_concurrency
+
+        # Output token usage, to check max_tokens against what responses need
+        self.api_calls = 0
+        self.completion_tokens = 0
+
+        # EMBEDDING_MODEL is an OpenAI model a local chat server won't serve
+        embed_client = self.client
+        if base_url is not None and (semantic_threshold is not None or prefilter):
+            embed_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+        # Cached scores are only valid for this exact model + rubric
+        self.cache = None
+        if cache_dir is not None:
+            self.cache = RubricCache(
+                cache_dir,
+                namespace="\n".join([self.model, RUBRIC_SYSTEM_PROMPT, json.dumps(RUBRIC_SCHEMA)]),
+                client=embed_client,
+                semantic_threshold=semantic_threshold,
+            )
+
+        self.prefilter = None
+        self.prefiltered = 0
+        self._prefilter_fitted = False
+        if prefilter:
+            if self.cache is None:
+                raise ValueError("prefilter needs a cache_dir to train on")
+            self.prefilter = RubricPrefilter(FLAG_ATTRS)
+
+    def _rubric_request(self, dialogue: dict) -> dict:
+        """Build chat completion kwargs for scoring one dialogue."""
+
+        # Extract dialogue content
+        teacher_opening = dialogue["instructor"]["opening_diegetic"]
+        student_response = dialogue["student_response"]["diegetic"]
+        student_non_diegetic = dialogue["student_response"]["non_diegetic"]
+
+        return {
+            "model": self.model,
+            "max_tokens": 384,
+            "response_format": RUBRIC_RESPONSE_FORMAT,
+            "messages": [
+                {"role": "system", "content": RUBRIC_SYSTEM_PROMPT},
+                {"role": "user", "content": RUBRIC_USER_TEMPLATE.format(
+                    teacher=teacher_opening,
+                    student=student_response,
+                    thinking=student_non_diegetic,
+                )},
+            ],
+        }
 
-    def score_dialogue(self, dialogue: dict) -> RubricScore:
+    def _record_usage(self, response):
+        """Accumulate completion token counts from an API response."""
+        self.api_calls += 1
+        if response.usage is not None:
+            self.completion_tokens += response.usage.completion_tokens
+
+    async def _prefilter_score(self, dialogue: dict, dialogue_id: str) -> Optional[RubricScore]:
+        """Score from the embedding prefilter, or None if it isn't confident."""
+
+        if not self._prefilter_fitted:
+            # Train once per run, on whatever labeled embeddings the cache has
+            self._prefilter_fitted = True
+            if not self.prefilter.fit(self.cache.labeled_embeddings()):
+                print(f"Prefilter: fewer than {self.prefilter.min_examples} cached embeddings, skipping")
+
+        # Embed even while untrained: on a miss the embedding is stored with
+        # the LLM score, which is what later runs train on
+        vector = await self.cache.embedding(dialogue)
+
+        if not self.prefilter.trained:
+            return None
+
+        result = self.prefilter.predict(vector)
+        if result is None:
+            # Goes to the LLM; the embedding is stored with that score
+            return None
+
+        # Predictions aren't cached, so they never become training labels
+        self.cache.discard(dialogue)
+        predictions, confidence = result
+        self.prefiltered += 1
+        return RubricScore(
+            dialogue_id=dialogue_id,
+            flags=sum(mask for attr, mask in FLAG_ATTRS.items() if predictions[attr]),
+            reasoning="Predicted by embedding prefilter",
+            confidence=confidence,
+        )
+
+    async def score_dialogue(self, dialogue: dict) -> RubricScore:
         """Score a single dialogue against binary rubric.
 
         Args:
@@ -70,214 +382,260 @@ class BinaryRubricScorer:
             RubricScore with pass/fail and component breakdown
         """
 
-        # Extract dialogue content
-        teacher_opening = dialogue["instructor"]["opening_diegetic"]
-        student_response = dialogue["student_response"]["diegetic"]
-        student_non_diegetic = dialogue["student_response"]["non_diegetic"]
         dialogue_id = dialogue.get("timestamp", "unknown")
 
-        # Create evaluation prompt
-        prompt = f"""You are evaluating a teaching dialogue against a pedagogical rubric.
+        if self.cache is not None:
+            cached = await self.cache.get(dialogue)
+            if cached is not None:
+                return replace(RubricScore.from_dict(cached), dialogue_id=dialogue_id)
 
-DIALOGUE:
-Teacher: {teacher_opening}
+        if self.prefilter is not None:
+            score = await self._prefilter_score(dialogue, dialogue_id)
+            if score is not None:
+                return score
 
-Student: {student_response}
+        try:
+            response = await self.chat.create(
+                **self._rubric_request(dialogue)
+            )
 
-Student's thinking (non-diegetic): {student_non_diegetic}
+            self._record_usage(response)
+            result_text = response.choices[0].message.content
 
-EVALUATE THIS DIALOGUE on the following criteria:
+            # Parse response
+            score = self._parse_rubric_response(result_text, dialogue_id)
+        except BaseException:
+            # Nothing will be stored, so drop any embedding computed on the miss
+            if self.cache is not None:
+                self.cache.discard(dialogue)
+            raise
 
-HARD STOPS (any single failure = FAIL overall):
-1. Shaming/Belittling: Did the teacher shame, mock, or belittle the student? (YES = hard stop failure)
-2. Complete Answer: Did the teacher give a complete answer directly instead of guiding? (YES = hard stop failure)
-3. Emotional Dismissal: Did the teacher ignore or dismiss the student's emotional state? (YES = hard stop failure)
-4. Agency Removal: Did the teacher remove the student's agency or control? (YES = hard stop failure)
+        if self.cache is not None:
+            await self.cache.put(dialogue, score.to_dict())
 
-PASS CRITERIA (all must be TRUE for overall PASS):
-1. Asks, Not Tells: Did the teacher use questions and guide rather than direct commands? (YES/NO)
-2. Open-Ended: Can the student push back or disagree? Not yes/no questions. (YES/NO)
-3. Agency: Does the student maintain control and choice? (YES/NO)
-4. References Specific: Did the teacher reference the student's actual words or context? (YES/NO)
-5. Emotional Aware: Did the teacher acknowledge or honor the student's emotional state? (YES/NO)
-6. Visible Progress: Does the student show understanding shift or deeper confusion articulated? (YES/NO)
-7. Pushback Safe: Can the student safely disagree without consequence? (YES/NO)
+        return score
 
-REASONING:
-For each criterion, explain your evaluation briefly (1-2 sentences).
+    def _parse_rubric_response(self, response_text: str, dialogue_id: str) -> RubricScore:
+        """Parse LLM rubric evaluation response (JSON matching RUBRIC_SCHEMA)."""
+        return self._score_from_data(serialization.loads(response_text), dialogue_id)
+
+    def _score_from_data(self, data: dict, dialogue_id: str) -> RubricScore:
+        """Build a RubricScore from a decoded RUBRIC_SCHEMA object."""
+
+        # Hard stops report violations; a set flag means OK (e.g. no shaming)
+        components = {
+            "asks_not_tells": data["pass_criteria"]["asks_not_tells"]["pass"],
+            "open_ended": data["pass_criteria"]["open_ended"]["pass"],
+            "agency_preserved": data["pass_criteria"]["agency"]["pass"],
+            "references_specific": data["pass_criteria"]["references_specific"]["pass"],
+            "emotional_aware": data["pass_criteria"]["emotional_aware"]["pass"],
+            "visible_progress": data["pass_criteria"]["visible_progress"]["pass"],
+            "pushback_safe": data["pass_criteria"]["pushback_safe"]["pass"],
+            "no_shaming": not data["hard_stops"]["shaming"],
+            "no_complete_answers": not data["hard_stops"]["complete_answer"],
+            "no_emotional_dismissal": not data["hard_stops"]["emotional_dismissal"],
+            "no_agency_removal": not data["hard_stops"]["agency_removal"],
+        }
 
-FORMAT YOUR RESPONSE EXACTLY AS:
+        # Overall pass (RubricScore.pass_fail) requires every flag set:
+        # all pass criteria met and no hard stop violated
+        flags = 0
+        for attr, ok in components.items():
+            if ok:
+                flags |= FLAG_ATTRS[attr]
 
-HARD_STOPS:
-Shaming: NO/YES
-Complete_Answer: NO/YES
-Emotional_Dismissal: NO/YES
-Agency_Removal: NO/YES
+        overall = data["overall"]
 
-PASS_CRITERIA:
-Asks_Not_Tells: YES/NO - [brief reason]
-Open_Ended: YES/NO - [brief reason]
-Agency: YES/NO - [brief reason]
-References_Specific: YES/NO - [brief reason]
-Emotional_Aware: YES/NO - [brief reason]
-Visible_Progress: YES/NO - [brief reason]
-Pushback_Safe: YES/NO - [brief reason]
+        return RubricScore(
+            dialogue_id=dialogue_id,
+            flags=flags,
+            reasoning=overall["reasoning"],
+            confidence=float(overall["confidence"]),
+        )
 
-OVERALL:
-PASS/FAIL - [summary reasoning]
-CONFIDENCE: [0.0-1.0]
-"""
+    async def _score_file(
+        self,
+        filepath: Path,
+        sem: asyncio.Semaphore,
+        label: str,
+        log: Optional[BinaryIO] = None,
+    ) -> Optional[Tuple[str, RubricScore]]:
+        """Score one dialogue file, holding a semaphore slot for the API call."""
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            max_tokens=800,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
+        async with sem:
+            try:
+                async with aiofiles.open(filepath, "rb") as f:
+                    dialogue = serialization.loads(await f.read())
 
-        result_text = response.choices[0].message.content
+                score = await self.score_dialogue(dialogue)
 
-        # Parse response
-        return self._parse_rubric_response(result_text, dialogue_id)
+            except Exception as e:
+                print(f"{label} {filepath.name}... ✗ {e}")
+                return None
 
-    def _parse_rubric_response(self, response_text: str, dialogue_id: str) -> RubricScore:
-        """Parse LLM rubric evaluation response."""
+        _log_score(log, filepath.name, score)
+        print(f"{label} {filepath.name}... ✓ {'PASS' if score.pass_fail else 'FAIL'}")
+        return filepath.name, score
 
-        lines = response_text.strip().split("\n")
+    def _resume(self, files: List[Path], log_path: Optional[Path]):
+        """Split matrix files into (already logged scores, files still to score)."""
 
-        # Initialize all to False/None
-        hard_stops = {
-            "shaming": True,  # True = OK (no shaming)
-            "complete_answer": True,
-            "emotional_dismissal": True,
-            "agency_removal": True,
-        }
+        if log_path is None:
+            return {}, files
 
-        pass_criteria = {
-            "asks_not_tells": False,
-            "open_ended": False,
-            "agency": False,
-            "references_specific": False,
-            "emotional_aware": False,
-            "visible_progress": False,
-            "pushback_safe": False,
-        }
+        results = read_score_log(log_path)
+        if results:
+            print(f"Resuming: {len(results)} dialogues already scored in {log_path}")
 
-        overall_pass = False
-        confidence = 0.5
-        reasoning = ""
+        return results, [filepath for filepath in files if filepath.name not in results]
 
-        # Parse hard stops section
-        in_hard_stops = False
-        for line in lines:
-            if "HARD_STOPS:" in line:
-                in_hard_stops = True
-                continue
-            if "PASS_CRITERIA:" in line:
-                in_hard_stops = False
-                continue
+    async def score_directory_async(self, directory: str, log_path: Optional[str] = None) -> dict:
+        """Score all dialogues in a directory, up to max_concurrency at a time.
 
-            if in_hard_stops and ":" in line:
-                parts = line.split(":")
-                if len(parts) >= 2:
-                    key = parts[0].strip().lower().replace(" ", "_")
-                    val = parts[1].strip().upper()
-
-                    if "shaming" in key:
-                        hard_stops["shaming"] = "NO" in val
-                    elif "complete" in key:
-                        hard_stops["complete_answer"] = "NO" in val
-                    elif "emotional" in key:
-                        hard_stops["emotional_dismissal"] = "NO" in val
-                    elif "agency" in key:
-                        hard_stops["agency_removal"] = "NO" in val
-
-        # Parse pass criteria section
-        in_pass = False
-        for line in lines:
-            if "PASS_CRITERIA:" in line:
-                in_pass = True
-                continue
-            if "OVERALL:" in line:
-                in_pass = False
-                continue
+        Args:
+            directory: Directory of matrix_*.json dialogue files
+            log_path: Optional JSONL score log. Each score is appended as
+                soon as it completes, and files already in the log are
+                skipped, so re-running after a crash resumes the run.
+        """
+        return await self.score_files_async(iter_matrix_files(directory), log_path)
 
-            if in_pass and ":" in line:
-                parts = line.split(":")
-                if len(parts) >= 2:
-                    key = parts[0].strip().lower().replace(" ", "_")
-                    val = parts[1].strip().upper()
-
-                    for criterion in pass_criteria.keys():
-                        if criterion in key:
-                            pass_criteria[criterion] = "YES" in val
-                            break
-
-        # Parse overall result
-        for line in lines:
-            if "OVERALL:" in line:
-                if "PASS" in line.upper():
-                    overall_pass = True
-                if "CONFIDENCE:" in lines[lines.index(line) + 1] if line.index(line) + 1 < len(lines) else False:
-                    try:
-                        conf_line = lines[lines.index(line) + 1]
-                        confidence = float(conf_line.split(":")[-1].strip())
-                    except:
-                        pass
-
-                # Get reasoning (rest of the line after OVERALL:)
-                reasoning = line.split("-")[-1].strip() if "-" in line else ""
-
-        # Determine overall pass:
-        # Hard stops must all be True (no violations)
-        # All pass criteria must be True
-        hard_stops_ok = all(hard_stops.values())
-        pass_criteria_ok = all(pass_criteria.values())
-
-        final_pass = hard_stops_ok and pass_criteria_ok
+    async def score_files_async(self, files: List[Path], log_path: Optional[str] = None) -> dict:
+        """Score already-listed dialogue files, up to max_concurrency at a time.
 
-        return RubricScore(
-            dialogue_id=dialogue_id,
-            pass_fail=final_pass,
-            asks_not_tells=pass_criteria["asks_not_tells"],
-            open_ended=pass_criteria["open_ended"],
-            agency_preserved=pass_criteria["agency"],
-            references_specific=pass_criteria["references_specific"],
-            emotional_aware=pass_criteria["emotional_aware"],
-            visible_progress=pass_criteria["visible_progress"],
-            pushback_safe=pass_criteria["pushback_safe"],
-            no_shaming=hard_stops["shaming"],
-            no_complete_answers=hard_stops["complete_answer"],
-            no_emotional_dismissal=hard_stops["emotional_dismissal"],
-            no_agency_removal=hard_stops["agency_removal"],
-            reasoning=reasoning,
-            confidence=confidence,
-        )
+        Args:
+            files: Dialogue file paths (e.g. from iter_matrix_files)
+            log_path: Optional JSONL score log, as in score_directory_async
+        """
 
-    def score_directory(self, directory: str) -> dict:
-        """Score all dialogues in a directory."""
+        log_path = Path(log_path) if log_path is not None else None
+        results, files = self._resume(files, log_path)
+        sem = asyncio.Semaphore(self.max_concurrency)
 
-        results = {}
-        files = sorted(Path(directory).glob("matrix_*.json"))
+        with _open_score_log(log_path) as log:
+            tasks = [
+                self._score_file(filepath, sem, f"[{i+1}/{len(files)}]", log)
+                for i, filepath in enumerate(files)
+            ]
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
 
-        for i, filepath in enumerate(files):
-            print(f"[{i+1}/{len(files)}] {filepath.name}...", end=" ", flush=True)
+        for filepath, outcome in zip(files, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"✗ {filepath.name}: {outcome}")
+            elif outcome is not None:
+                name, score = outcome
+                results[name] = score
 
-            try:
-                with open(filepath) as f:
-                    dialogue = json.load(f)
+        return results
+
+    def score_directory(self, directory: str, log_path: Optional[str] = None) -> dict:
+        """Score all dialogues in a directory."""
+        return asyncio.run(self.score_directory_async(directory, log_path))
+
+    async def score_directory_batch_async(
+        self,
+        directory: str,
+        poll_interval: float = 30.0,
+        log_path: Optional[str] = None,
+    ) -> dict:
+        """Score all dialogues in a directory through the OpenAI Batch API.
+
+        Costs about half of score_directory and avoids rate limits, but
+        results can take up to 24h to come back. log_path works as in
+        score_directory_async.
+        """
+        return await self.score_files_batch_async(
+            iter_matrix_files(directory), Path(directory), poll_interval, log_path
+        )
 
-                score = self.score_dialogue(dialogue)
-                results[filepath.name] = score
+    async def score_files_batch_async(
+        self,
+        files: List[Path],
+        batch_dir: Path,
+        poll_interval: float = 30.0,
+        log_path: Optional[str] = None,
+    ) -> dict:
+        """Score already-listed dialogue files through the OpenAI Batch API.
 
-                print(f"✓ {'PASS' if score.pass_fail else 'FAIL'}")
+        Args:
+            files: Dialogue file paths (e.g. from iter_matrix_files)
+            batch_dir: Where to write the batch input file
+            poll_interval: Seconds between batch status checks
+            log_path: Optional JSONL score log, as in score_directory_async
+        """
 
-            except Exception as e:
-                print(f"✗ {e}")
+        log_path = Path(log_path) if log_path is not None else None
+        results, files = self._resume(files, log_path)
+        requests = []
+        dialogues = {}
+
+        with _open_score_log(log_path) as log:
+            for filepath in files:
+                try:
+                    dialogue = serialization.loads(filepath.read_bytes())
+                except Exception as e:
+                    print(f"✗ {filepath.name}: {e}")
+                    continue
+
+                dialogue_id = dialogue.get("timestamp", "unknown")
+
+                # Settle what we can locally; only the rest goes into the batch
+                score = None
+                if self.cache is not None:
+                    cached = await self.cache.get(dialogue)
+                    if cached is not None:
+                        score = replace(RubricScore.from_dict(cached), dialogue_id=dialogue_id)
+
+                if score is None and self.prefilter is not None:
+                    score = await self._prefilter_score(dialogue, dialogue_id)
+
+                if score is not None:
+                    results[filepath.name] = score
+                    _log_score(log, filepath.name, score)
+                    continue
+
+                dialogues[filepath.name] = dialogue
+                requests.append(batch_request(filepath.name, self._rubric_request(dialogue)))
+
+            if not requests:
+                return results
+
+            contents = await run_batch(
+                self.client,
+                requests,
+                Path(batch_dir) / "batch_input.jsonl",
+                poll_interval=poll_interval,
+            )
+
+            for name, dialogue in dialogues.items():
+                if name not in contents:
+                    continue
+
+                # One truncated or malformed output mustn't discard the rest of the batch
+                try:
+                    score = self._parse_rubric_response(contents[name], dialogue.get("timestamp", "unknown"))
+                    results[name] = score
+                    _log_score(log, name, score)
+
+                    if self.cache is not None:
+                        await self.cache.put(dialogue, score.to_dict())
+
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"✗ {name}: {e}")
+                    if self.cache is not None:
+                        self.cache.discard(dialogue)
 
         return results
 
+    def score_directory_batch(
+        self,
+        directory: str,
+        poll_interval: float = 30.0,
+        log_path: Optional[str] = None,
+    ) -> dict:
+        """Score all dialogues in a directory via the Batch API (blocks until done)."""
+        return asyncio.run(self.score_directory_batch_async(directory, poll_interval, log_path))
+
     def print_results_summary(self, results: dict):
         """Print summary of rubric scores."""
 
@@ -285,8 +643,15 @@ CONFIDENCE: [0.0-1.0]
             print("No results to summarize.")
             return
 
+        # One pass over the results; at most 2**11 distinct flag words to
+        # expand into per-criterion counts afterwards
+        tally = Counter(r.flags for r in results.values())
+
+        def count(mask: int) -> int:
+            return sum(n for flags, n in tally.items() if flags & mask)
+
         total = len(results)
-        passes = sum(1 for r in results.values() if r.pass_fail)
+        passes = tally[ALL_FLAGS]
         fails = total - passes
 
         print(f"\n{'='*80}")
@@ -296,22 +661,17 @@ CONFIDENCE: [0.0-1.0]
         print(f"PASS: {passes} ({passes/total:.0%})")
         print(f"FAIL: {fails} ({fails/total:.0%})")
 
+        if self.api_calls:
+            print(f"Avg completion tokens: {self.completion_tokens / self.api_calls:.0f} over {self.api_calls} API calls")
+        if self.prefiltered:
+            print(f"Settled by prefilter (no LLM call): {self.prefiltered}")
+
         # Breakdown by criterion
         print(f"\n{'Criterion':<25} {'PASS':<10} {'FAIL':<10} {'Rate':<10}")
         print("-" * 60)
 
-        criteria = [
-            ("Asks_Not_Tells", "asks_not_tells"),
-            ("Open_Ended", "open_ended"),
-            ("Agency", "agency_preserved"),
-            ("References_Specific", "references_specific"),
-            ("Emotional_Aware", "emotional_aware"),
-            ("Visible_Progress", "visible_progress"),
-            ("Pushback_Safe", "pushback_safe"),
-        ]
-
-        for label, attr in criteria:
-            count_true = sum(1 for r in results.values() if getattr(r, attr))
+        for label, mask in SUMMARY_CRITERIA:
+            count_true = count(mask)
             count_false = total - count_true
             rate = count_true / total if total > 0 else 0
             print(f"{label:<25} {count_true:<10} {count_false:<10} {rate:.0%}")
@@ -320,15 +680,8 @@ CONFIDENCE: [0.0-1.0]
         print(f"\n{'Hard Stops':<25} {'SAFE':<10} {'VIOLATED':<10}")
         print("-" * 60)
 
-        hard_stops = [
-            ("No Shaming", "no_shaming"),
-            ("No Complete Answers", "no_complete_answers"),
-            ("No Emotional Dismissal", "no_emotional_dismissal"),
-            ("No Agency Removal", "no_agency_removal"),
-        ]
-
-        for label, attr in hard_stops:
-            count_safe = sum(1 for r in results.values() if getattr(r, attr))
+        for label, mask in SUMMARY_HARD_STOPS:
+            count_safe = count(mask)
             count_violated = total - count_safe
             print(f"{label:<25} {count_safe:<10} {count_violated:<10}")
 
@@ -336,7 +689,12 @@ CONFIDENCE: [0.0-1.0]
 if __name__ == "__main__":
     import sys
 
-    scorer = BinaryRubricScorer()
+    scorer = BinaryRubricScorer(
+        cache_dir=None if "--no-cache" in sys.argv else "data/.rubric_cache",
+        base_url=os.getenv("RUBRIC_BASE_URL"),
+        model=os.getenv("RUBRIC_MODEL", "gpt-4o-mini"),
+        prefilter="--prefilter" in sys.argv,
+    )
 
     # Score all dialogues in matrix directory
     dialogue_dir = "data/matrix"
@@ -345,29 +703,21 @@ if __name__ == "__main__":
         print(f"Directory {dialogue_dir} not found.")
         sys.exit(1)
 
-    print("Scoring all dialogues against binary rubric...")
-    results = scorer.score_directory(dialogue_dir)
+    # Scores stream to the JSONL log as they complete; re-running resumes
+    log_file = Path(dialogue_dir) / "rubric_scores.jsonl"
+
+    if "--batch" in sys.argv:
+        print("Submitting all dialogues to the Batch API (may take up to 24h)...")
+        results = scorer.score_directory_batch(dialogue_dir, log_path=log_file)
+    else:
+        print("Scoring all dialogues against binary rubric...")
+        results = scorer.score_directory(dialogue_dir, log_path=log_file)
 
     scorer.print_results_summary(results)
 
-    # Save results
+    # Aggregate the log into a single JSON file
     output_file = Path(dialogue_dir) / "rubric_scores.json"
-    with open(output_file, "w") as f:
-        json.dump({k: {
-            "pass_fail": v.pass_fail,
-            "asks_not_tells": v.asks_not_tells,
-            "open_ended": v.open_ended,
-            "agency_preserved": v.agency_preserved,
-            "references_specific": v.references_specific,
-            "emotional_aware": v.emotional_aware,
-            "visible_progress": v.visible_progress,
-            "pushback_safe": v.pushback_safe,
-            "no_shaming": v.no_shaming,
-            "no_complete_answers": v.no_complete_answers,
-            "no_emotional_dismissal": v.no_emotional_dismissal,
-            "no_agency_removal": v.no_agency_removal,
-            "reasoning": v.reasoning,
-            "confidence": v.confidence,
-        } for k, v in results.items()}, f, indent=2)
-
-    print(f"\nScores saved to: {output_file}")
+    with open(output_file, "wb") as f:
+        f.write(serialization.dumps({k: v.to_dict() for k, v in read_score_log(log_file).items()}, indent=True))
+
+    print(f"\nScores saved to: {output_file} (log: {log_file})")
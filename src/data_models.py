@@ -6,7 +6,7 @@ How they're loaded (proprietary vs examples) is handled by loaders.
 """
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Tuple
 from enum import Enum
 
 
@@ -44,7 +44,7 @@ class Persona:
     name: str
     archetype: str
     description: str
-    question_keys: List[str]  # References to ConstitutionalQuestion.key
+    question_keys: Tuple[str, ...]  # References to ConstitutionalQuestion.key
 
     @property
     def num_questions(self) -> int:
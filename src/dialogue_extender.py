@@ -7,14 +7,103 @@ Extended: Opening → Student Response → Teacher Response 2 → Student Respon
 This allows us to see actual learning progression rather than single-shot reactions.
 """
 
-import json
+import asyncio
+import functools
 import os
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 
-from openai import OpenAI
+import aiofiles
+from openai import AsyncOpenAI
+
+import serialization
+from llm_client import ChatClient
+from loaders import iter_matrix_files
+from openai_batch import batch_request, run_batch
+
+
+# System prompts depend only on persona identity, never on dialogue content, so
+# every dialogue with the same instructor (or student) sends an identical prefix.
+TEACHER_SYSTEM_TEMPLATE = """You are {teacher_name}, a {archetype}.
+
+The student has just responded to your opening. Continue the dialogue by:
+1. Acknowledging what the student said
+2. Asking a follow-up question or providing a gentle clarification
+3. Checking if they're understanding better or still confused
+
+Keep it to 2-3 sentences. Stay in character."""
+
+STUDENT_SYSTEM_TEMPLATE = """You are {student_name}, a student working on {student_domain}.
+
+In this dialogue, you've already responded once. Now the teacher has responded again.
+Respond realistically:
+- If the teacher's clarification helped, show understanding shift
+- If you're still confused, articulate what specifically confuses you
+- If the teaching feels off, push back respectfully
+
+Keep it to 2-3 sentences. Be authentic."""
+
+# Both turns in one call: the student turn still reacts to the teacher turn,
+# but it is written in the same context instead of a second round-trip.
+TWO_TURN_SYSTEM_TEMPLATE = """You will role-play TWO turns in a teaching dialogue: first as {teacher_name} responding to the student, then as {student_name} responding to that teacher turn.
+
+TEACHER TURN (teacher_response_2):
+{teacher_system}
+
+STUDENT TURN (student_response_2):
+{student_system}
+
+Respond with a JSON object only:
+{{"teacher_response_2": "<teacher turn>", "student_response_2": "<student turn>"}}"""
+
+
+@functools.lru_cache(maxsize=256)
+def _teacher_system(teacher_name: str, archetype: str) -> str:
+    """Teacher system prompt, built once per instructor and reused verbatim."""
+    return TEACHER_SYSTEM_TEMPLATE.format(
+        teacher_name=teacher_name.strip(),
+        archetype=archetype.strip(),
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _student_system(student_name: str, student_domain: str) -> str:
+    """Student system prompt, built once per student and reused verbatim."""
+    return STUDENT_SYSTEM_TEMPLATE.format(
+        student_name=student_name.strip(),
+        student_domain=student_domain.strip(),
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _two_turn_system(teacher_name: str, archetype: str, student_name: str, student_domain: str) -> str:
+    """Two-turn system prompt, built once per instructor/student pairing."""
+    return TWO_TURN_SYSTEM_TEMPLATE.format(
+        teacher_name=teacher_name.strip(),
+        student_name=student_name.strip(),
+        teacher_system=_teacher_system(teacher_name, archetype),
+        student_system=_student_system(student_name, student_domain),
+    )
+
+
+def _parse_two_turns(text: str) -> Optional[Tuple[str, str]]:
+    """Extract (teacher_response_2, student_response_2), or None if malformed."""
+
+    try:
+        data = serialization.loads(text)
+    except ValueError:
+        return None
+
+    if not isinstance(data, dict):
+        return None
+
+    turns = data.get("teacher_response_2"), data.get("student_response_2")
+    if not all(isinstance(turn, str) and turn.strip() for turn in turns):
+        return None
+
+    return turns
 
 
 @dataclass
@@ -37,71 +126,97 @@ class ExtendedDialogue:
     timestamp: str
 
 
+def _build_extended(
+    dialogue: dict,
+    teacher_response_2: str,
+    student_response_2: str,
+) -> ExtendedDialogue:
+    """Combine the original round with the generated second round."""
+
+    return ExtendedDialogue(
+        original_file=dialogue.get("timestamp", "unknown"),
+        instructor_name=dialogue["instructor"]["name"],
+        student_name=dialogue["student"]["name"],
+        scenario_id=dialogue["scenario"]["id"],
+        teacher_opening=dialogue["instructor"]["opening_diegetic"],
+        student_response_1=dialogue["student_response"]["diegetic"],
+        teacher_response_2=teacher_response_2,
+        student_response_2=student_response_2,
+        timestamp=datetime.now().isoformat(),
+    )
+
+
 class DialogueExtender:
     """Extend short dialogues to 2-3 rounds showing learning progression."""
 
-    def __init__(self, api_key: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        max_concurrency: int = 32,
+        rpm_limit: Optional[int] = None,
+        tpm_limit: Optional[int] = None,
+    ):
         if api_key is None:
             api_key = os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=api_key)
+        self.client = AsyncOpenAI(api_key=api_key)
+        self.chat = ChatClient(self.client, rpm_limit=rpm_limit, tpm_limit=tpm_limit)
+        self.max_concurrency = max_concurrency
+
+    def _two_turn_request(self, dialogue: dict) -> dict:
+        """Build chat completion kwargs for both second-round turns at once."""
+
+        system = _two_turn_system(
+            dialogue["instructor"]["name"],
+            dialogue["instructor"]["archetype"],
+            dialogue["student"]["name"],
+            dialogue["student"]["domain"],
+        )
 
-    def extend_dialogue(self, dialogue: dict) -> Tuple[ExtendedDialogue, bool]:
-        """Extend a single dialogue by one more round.
+        prompt = f"""Student just said: "{dialogue["student_response"]["diegetic"]}"
 
-        Args:
-            dialogue: Original dialogue dict from matrix
+Write the teacher's next turn and the student's reaction to it."""
 
-        Returns:
-            (ExtendedDialogue, success_bool)
-        """
+        return {
+            "model": "gpt-4o-mini",
+            "max_tokens": 240,
+            "temperature": 0.9,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+        }
 
-        teacher_name = dialogue["instructor"]["name"]
-        student_name = dialogue["student"]["name"]
-        scenario_id = dialogue["scenario"]["id"]
-        student_domain = dialogue["student"]["domain"]
+    def _teacher_request(self, dialogue: dict) -> dict:
+        """Build chat completion kwargs for the teacher's second turn."""
 
-        teacher_opening = dialogue["instructor"]["opening_diegetic"]
+        teacher_name = dialogue["instructor"]["name"]
         student_response_1 = dialogue["student_response"]["diegetic"]
-        student_emotional = dialogue["student"]["name"]  # Use for context
 
-        # Generate teacher's second response (reacting to student pushback/confusion)
-        teacher_system = f"""You are {teacher_name}, a {dialogue["instructor"]["archetype"]}.
-
-The student has just responded to your opening. Continue the dialogue by:
-1. Acknowledging what the student said
-2. Asking a follow-up question or providing a gentle clarification
-3. Checking if they're understanding better or still confused
-
-Keep it to 2-3 sentences. Stay in character."""
+        # Teacher reacts to student pushback/confusion
+        teacher_system = _teacher_system(teacher_name, dialogue["instructor"]["archetype"])
 
         teacher_prompt = f"""Student just said: "{student_response_1}"
 
 Respond as {teacher_name} to continue the dialogue. Help them move forward."""
 
-        try:
-            teacher_response_2 = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                max_tokens=200,
-                temperature=0.9,
-                messages=[
-                    {"role": "system", "content": teacher_system},
-                    {"role": "user", "content": teacher_prompt},
-                ]
-            ).choices[0].message.content
-        except Exception as e:
-            print(f"Error generating teacher response 2: {e}")
-            return None, False
+        return {
+            "model": "gpt-4o-mini",
+            "max_tokens": 120,
+            "temperature": 0.9,
+            "messages": [
+                {"role": "system", "content": teacher_system},
+                {"role": "user", "content": teacher_prompt},
+            ],
+        }
 
-        # Generate student's second response (showing progress, deeper confusion, or pushback)
-        student_system = f"""You are {student_name}, a student working on {student_domain}.
+    def _student_request(self, dialogue: dict, teacher_response_2: str) -> dict:
+        """Build chat completion kwargs for the student's second turn."""
 
-In this dialogue, you've already responded once. Now the teacher has responded again.
-Respond realistically:
-- If the teacher's clarification helped, show understanding shift
-- If you're still confused, articulate what specifically confuses you
-- If the teaching feels off, push back respectfully
+        student_response_1 = dialogue["student_response"]["diegetic"]
 
-Keep it to 2-3 sentences. Be authentic."""
+        # Student shows progress, deeper confusion, or pushback
+        student_system = _student_system(dialogue["student"]["name"], dialogue["student"]["domain"])
 
         student_prompt = f"""Teacher just said: "{teacher_response_2}"
 
@@ -109,83 +224,279 @@ Your previous statement was: "{student_response_1}"
 
 Respond. What's your reaction to the teacher's response?"""
 
+        return {
+            "model": "gpt-4o-mini",
+            "max_tokens": 120,
+            "temperature": 0.9,
+            "messages": [
+                {"role": "system", "content": student_system},
+                {"role": "user", "content": student_prompt},
+            ],
+        }
+
+    async def extend_dialogue(self, dialogue: dict) -> Tuple[ExtendedDialogue, bool]:
+        """Extend a single dialogue by one more round.
+
+        Both turns come from one call; if its JSON is malformed, falls back
+        to separate teacher and student calls.
+
+        Args:
+            dialogue: Original dialogue dict from matrix
+
+        Returns:
+            (ExtendedDialogue, success_bool)
+        """
+
         try:
-            student_response_2 = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                max_tokens=200,
-                temperature=0.9,
-                messages=[
-                    {"role": "system", "content": student_system},
-                    {"role": "user", "content": student_prompt},
-                ]
-            ).choices[0].message.content
+            response = await self.chat.create(
+                **self._two_turn_request(dialogue)
+            )
         except Exception as e:
-            print(f"Error generating student response 2: {e}")
+            print(f"Error generating round 2: {e}")
             return None, False
 
-        extended = ExtendedDialogue(
-            original_file=dialogue.get("timestamp", "unknown"),
-            instructor_name=teacher_name,
-            student_name=student_name,
-            scenario_id=scenario_id,
-            teacher_opening=teacher_opening,
-            student_response_1=student_response_1,
-            teacher_response_2=teacher_response_2,
-            student_response_2=student_response_2,
-            timestamp=datetime.now().isoformat(),
-        )
+        turns = _parse_two_turns(response.choices[0].message.content)
+        if turns is not None:
+            return _build_extended(dialogue, *turns), True
 
-        return extended, True
+        return await self._extend_sequential(dialogue)
 
-    def extend_directory(self, input_dir: str, output_dir: str):
-        """Extend all dialogues in a directory."""
+    async def _extend_sequential(self, dialogue: dict) -> Tuple[ExtendedDialogue, bool]:
+        """Extend a dialogue with separate teacher and student calls."""
 
-        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        try:
+            response = await self.chat.create(
+                **self._teacher_request(dialogue)
+            )
+            teacher_response_2 = response.choices[0].message.content
+        except Exception as e:
+            print(f"Error generating teacher response 2: {e}")
+            return None, False
 
-        files = sorted(Path(input_dir).glob("matrix_*.json"))
-        results = []
+        try:
+            response = await self.chat.create(
+                **self._student_request(dialogue, teacher_response_2)
+            )
+            student_response_2 = response.choices[0].message.content
+        except Exception as e:
+            print(f"Error generating student response 2: {e}")
+            return None, False
 
-        for i, filepath in enumerate(files):
-            print(f"[{i+1}/{len(files)}] Extending {filepath.name}...", end=" ", flush=True)
+        return _build_extended(dialogue, teacher_response_2, student_response_2), True
 
+    async def _extend_file(
+        self,
+        filepath: Path,
+        output_dir: Path,
+        sem: asyncio.Semaphore,
+        label: str,
+    ) -> dict:
+        """Extend one dialogue file, holding a semaphore slot for its API calls."""
+
+        async with sem:
             try:
-                with open(filepath) as f:
-                    dialogue = json.load(f)
+                async with aiofiles.open(filepath, "rb") as f:
+                    dialogue = serialization.loads(await f.read())
 
-                extended, success = self.extend_dialogue(dialogue)
+                extended, success = await self.extend_dialogue(dialogue)
 
                 if success and extended:
                     # Save extended dialogue
                     output_filename = filepath.name.replace("matrix_", "extended_")
-                    output_path = Path(output_dir) / output_filename
+                    output_path = output_dir / output_filename
 
-                    with open(output_path, "w") as f:
-                        json.dump(asdict(extended), f, indent=2)
+                    async with aiofiles.open(output_path, "wb") as f:
+                        await f.write(serialization.dumps(extended, indent=True))
 
-                    results.append({
+                    print(f"{label} Extending {filepath.name}... ✓")
+                    return {
                         "original": filepath.name,
                         "extended": output_filename,
                         "status": "success",
-                    })
+                    }
 
-                    print(f"✓")
-                else:
-                    print(f"✗ Generation failed")
-                    results.append({
-                        "original": filepath.name,
-                        "status": "failed",
-                    })
+                print(f"{label} Extending {filepath.name}... ✗ Generation failed")
+                return {
+                    "original": filepath.name,
+                    "status": "failed",
+                }
 
             except Exception as e:
-                print(f"✗ {e}")
+                print(f"{label} Extending {filepath.name}... ✗ {e}")
+                return {
+                    "original": filepath.name,
+                    "status": "error",
+                    "error": str(e),
+                }
+
+    def _pending_files(self, files: List[Path], output_dir: Path) -> Tuple[list, list]:
+        """Split matrix files into (results for already extended, files to extend).
+
+        A dialogue counts as extended when its extended_*.json output exists,
+        so re-running only generates for new dialogues.
+        """
+
+        with os.scandir(output_dir) as entries:
+            existing = {entry.name for entry in entries if entry.name.startswith("extended_")}
+
+        results = []
+        pending = []
+        for filepath in files:
+            output_filename = filepath.name.replace("matrix_", "extended_")
+            if output_filename in existing:
+                results.append({
+                    "original": filepath.name,
+                    "extended": output_filename,
+                    "status": "success",
+                    "existing": True,
+                })
+            else:
+                pending.append(filepath)
+
+        if results:
+            print(f"Skipping {len(results)} dialogues already extended in {output_dir}")
+
+        return results, pending
+
+    async def extend_directory_async(self, input_dir: str, output_dir: str):
+        """Extend all dialogues in a directory, up to max_concurrency at a time."""
+        return await self.extend_files_async(iter_matrix_files(input_dir), output_dir)
+
+    async def extend_files_async(self, files: List[Path], output_dir: str):
+        """Extend already-listed dialogue files, up to max_concurrency at a time."""
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        results, files = self._pending_files(files, output_dir)
+        sem = asyncio.Semaphore(self.max_concurrency)
+
+        tasks = [
+            self._extend_file(filepath, output_dir, sem, f"[{i+1}/{len(files)}]")
+            for i, filepath in enumerate(files)
+        ]
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for filepath, outcome in zip(files, outcomes):
+            if isinstance(outcome, BaseException):
+                results.append({
+                    "original": filepath.name,
+                    "status": "error",
+                    "error": str(outcome),
+                })
+            else:
+                results.append(outcome)
+
+        return results
+
+    def extend_directory(self, input_dir: str, output_dir: str):
+        """Extend all dialogues in a directory."""
+        return asyncio.run(self.extend_directory_async(input_dir, output_dir))
+
+    async def extend_directory_batch_async(
+        self,
+        input_dir: str,
+        output_dir: str,
+        poll_interval: float = 30.0,
+    ):
+        """Extend all dialogues in a directory through the OpenAI Batch API.
+
+        One batch job generates both turns per dialogue. Dialogues whose
+        output is malformed go through two follow-up jobs back to back:
+        all teacher turns, then all student turns.
+        """
+        return await self.extend_files_batch_async(
+            iter_matrix_files(input_dir), output_dir, poll_interval
+        )
+
+    async def extend_files_batch_async(
+        self,
+        files: List[Path],
+        output_dir: str,
+        poll_interval: float = 30.0,
+    ):
+        """Extend already-listed dialogue files through the OpenAI Batch API."""
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        results, files = self._pending_files(files, output_dir)
+        dialogues = {}
+
+        for filepath in files:
+            try:
+                dialogues[filepath.name] = serialization.loads(filepath.read_bytes())
+            except Exception as e:
                 results.append({
                     "original": filepath.name,
                     "status": "error",
                     "error": str(e),
                 })
 
+        if not dialogues:
+            return results
+
+        contents = await run_batch(
+            self.client,
+            [batch_request(name, self._two_turn_request(d)) for name, d in dialogues.items()],
+            output_dir / "batch_input.jsonl",
+            poll_interval=poll_interval,
+        )
+
+        teacher_turns = {}
+        student_turns = {}
+        retry = []
+        for name, content in contents.items():
+            turns = _parse_two_turns(content)
+            if turns is None:
+                retry.append(name)
+            else:
+                teacher_turns[name], student_turns[name] = turns
+
+        retry_teacher_turns = await run_batch(
+            self.client,
+            [batch_request(name, self._teacher_request(dialogues[name])) for name in retry],
+            output_dir / "batch_teacher_input.jsonl",
+            poll_interval=poll_interval,
+        ) if retry else {}
+        teacher_turns.update(retry_teacher_turns)
+
+        student_turns.update(await run_batch(
+            self.client,
+            [
+                batch_request(name, self._student_request(dialogues[name], teacher_response_2))
+                for name, teacher_response_2 in retry_teacher_turns.items()
+            ],
+            output_dir / "batch_student_input.jsonl",
+            poll_interval=poll_interval,
+        ) if retry_teacher_turns else {})
+
+        for name, dialogue in dialogues.items():
+            if name not in student_turns:
+                results.append({
+                    "original": name,
+                    "status": "failed",
+                })
+                continue
+
+            extended = _build_extended(dialogue, teacher_turns[name], student_turns[name])
+            output_filename = name.replace("matrix_", "extended_")
+
+            with open(output_dir / output_filename, "wb") as f:
+                f.write(serialization.dumps(extended, indent=True))
+
+            results.append({
+                "original": name,
+                "extended": output_filename,
+                "status": "success",
+            })
+
         return results
 
+    def extend_directory_batch(self, input_dir: str, output_dir: str, poll_interval: float = 30.0):
+        """Extend all dialogues in a directory via the Batch API (blocks until done)."""
+        return asyncio.run(self.extend_directory_batch_async(input_dir, output_dir, poll_interval))
+
     def print_example(self, extended: ExtendedDialogue):
         """Pretty-print an extended dialogue."""
 
@@ -203,6 +514,8 @@ Respond. What's your reaction to the teacher's response?"""
 
 
 if __name__ == "__main__":
+    import sys
+
     extender = DialogueExtender()
 
     input_dir = "data/matrix"
@@ -212,8 +525,12 @@ if __name__ == "__main__":
         print(f"Input directory {input_dir} not found.")
         exit(1)
 
-    print(f"Extending dialogues from {input_dir}...")
-    results = extender.extend_directory(input_dir, output_dir)
+    if "--batch" in sys.argv:
+        print(f"Extending dialogues from {input_dir} via the Batch API (may take up to 24h)...")
+        results = extender.extend_directory_batch(input_dir, output_dir)
+    else:
+        print(f"Extending dialogues from {input_dir}...")
+        results = extender.extend_directory(input_dir, output_dir)
 
     # Summary
     successes = sum(1 for r in results if r.get("status") == "success")
@@ -227,5 +544,5 @@ if __name__ == "__main__":
     print(f"Output directory: {output_dir}")
 
     # Save results index
-    with open(Path(output_dir) / "extension_results.json", "w") as f:
-        json.dump(results, f, indent=2)
+    with open(Path(output_dir) / "extension_results.json", "wb") as f:
+        f.write(serialization.dumps(results, indent=True))
@@ -0,0 +1,237 @@
+"""
+Dialogue pipeline - Score and extend a dialogue in one model call.
+
+Running BinaryRubricScorer and DialogueExtender separately costs three
+round-trips per dialogue (rubric, teacher turn 2, student turn 2) and sends
+the same round-1 dialogue three times. Here a single structured call
+returns both new turns plus the rubric evaluation of the original round.
+
+The rubric spec leads the system message so the cached prefix is shared
+across every dialogue; persona definitions follow it.
+
+Tradeoff: the one call samples at the extender's temperature (0.9) so the
+new turns stay varied, which makes its rubric verdicts noisier than
+BinaryRubricScorer's (default temperature). Use the standalone scorer when
+scores need to be comparable across runs. For the same reason, fused scores
+are not written to the rubric cache.
+"""
+
+import asyncio
+import functools
+from pathlib import Path
+from typing import Optional, Tuple
+
+import aiofiles
+
+from binary_rubric_scorer import (
+    BinaryRubricScorer,
+    RubricScore,
+    RUBRIC_SCHEMA,
+    RUBRIC_SYSTEM_PROMPT,
+    RUBRIC_USER_TEMPLATE,
+    _strict_object,
+)
+from dialogue_extender import (
+    ExtendedDialogue,
+    _build_extended,
+    _teacher_system,
+    _student_system,
+)
+import serialization
+from loaders import iter_matrix_files
+
+
+# Appended after RUBRIC_SYSTEM_PROMPT, which stays the leading (cached) prefix.
+EXTENSION_SYSTEM_TEMPLATE = """
+Put that evaluation of the ORIGINAL dialogue under "rubric".
+
+THEN CONTINUE THE DIALOGUE by one round, playing both sides.
+
+teacher_response_2 - the teacher's next turn, responding to the student:
+{teacher_system}
+
+student_response_2 - the student's reaction to that teacher turn:
+{student_system}
+"""
+
+FUSED_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "scored_extension",
+        "strict": True,
+        "schema": _strict_object({
+            "rubric": RUBRIC_SCHEMA,
+            "teacher_response_2": {"type": "string"},
+            "student_response_2": {"type": "string"},
+        }),
+    },
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _fused_system(teacher_name: str, archetype: str, student_name: str, student_domain: str) -> str:
+    """Combined system prompt, built once per instructor/student pairing."""
+    return RUBRIC_SYSTEM_PROMPT + EXTENSION_SYSTEM_TEMPLATE.format(
+        teacher_system=_teacher_system(teacher_name, archetype),
+        student_system=_student_system(student_name, student_domain),
+    )
+
+
+class DialoguePipeline:
+    """Score and extend dialogues with one structured call per dialogue."""
+
+    def __init__(
+        self,
+        api_key: str = None,
+        max_concurrency: int = 32,
+        rpm_limit: Optional[int] = None,
+        tpm_limit: Optional[int] = None,
+    ):
+        # No rubric cache: fused scores are sampled at a different temperature
+        # and must not be served to the standalone scorer (see module docstring)
+        self.scorer = BinaryRubricScorer(
+            api_key=api_key, cache_dir=None, rpm_limit=rpm_limit, tpm_limit=tpm_limit
+        )
+        self.client = self.scorer.client
+        self.chat = self.scorer.chat
+        self.max_concurrency = max_concurrency
+
+    def _fused_request(self, dialogue: dict) -> dict:
+        """Build chat completion kwargs for scoring + extending one dialogue."""
+
+        system = _fused_system(
+            dialogue["instructor"]["name"],
+            dialogue["instructor"]["archetype"],
+            dialogue["student"]["name"],
+            dialogue["student"]["domain"],
+        )
+
+        return {
+            "model": "gpt-4o-mini",
+            "max_tokens": 640,
+            "temperature": 0.9,  # generation temperature; see module docstring
+            "response_format": FUSED_RESPONSE_FORMAT,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": RUBRIC_USER_TEMPLATE.format(
+                    teacher=dialogue["instructor"]["opening_diegetic"],
+                    student=dialogue["student_response"]["diegetic"],
+                    thinking=dialogue["student_response"]["non_diegetic"],
+                )},
+            ],
+        }
+
+    async def score_and_extend(self, dialogue: dict) -> Tuple[ExtendedDialogue, RubricScore]:
+        """Score a dialogue and extend it by one round in a single call.
+
+        Args:
+            dialogue: Original dialogue dict from matrix
+
+        Returns:
+            (ExtendedDialogue, RubricScore for the original round)
+        """
+
+        response = await self.chat.create(
+            **self._fused_request(dialogue)
+        )
+        data = serialization.loads(response.choices[0].message.content)
+
+        score = self.scorer._score_from_data(data["rubric"], dialogue.get("timestamp", "unknown"))
+        extended = _build_extended(
+            dialogue, data["teacher_response_2"], data["student_response_2"]
+        )
+
+        return extended, score
+
+    async def _process_file(
+        self,
+        filepath: Path,
+        output_dir: Path,
+        sem: asyncio.Semaphore,
+        label: str,
+    ) -> Optional[Tuple[str, ExtendedDialogue, RubricScore]]:
+        """Score and extend one dialogue file, holding a semaphore slot."""
+
+        async with sem:
+            try:
+                async with aiofiles.open(filepath, "rb") as f:
+                    dialogue = serialization.loads(await f.read())
+
+                extended, score = await self.score_and_extend(dialogue)
+
+                output_filename = filepath.name.replace("matrix_", "extended_")
+                async with aiofiles.open(output_dir / output_filename, "wb") as f:
+                    await f.write(serialization.dumps(extended, indent=True))
+
+            except Exception as e:
+                print(f"{label} {filepath.name}... ✗ {e}")
+                return None
+
+        print(f"{label} {filepath.name}... ✓ {'PASS' if score.pass_fail else 'FAIL'}")
+        return output_filename, extended, score
+
+    async def process_directory_async(self, input_dir: str, output_dir: str) -> Tuple[dict, list]:
+        """Score and extend all dialogues in a directory.
+
+        Returns:
+            (scores keyed by matrix filename, extension results index)
+        """
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        files = iter_matrix_files(input_dir)
+        sem = asyncio.Semaphore(self.max_concurrency)
+
+        tasks = [
+            self._process_file(filepath, output_dir, sem, f"[{i+1}/{len(files)}]")
+            for i, filepath in enumerate(files)
+        ]
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        scores = {}
+        results = []
+        for filepath, outcome in zip(files, outcomes):
+            if isinstance(outcome, tuple):
+                output_filename, extended, score = outcome
+                scores[filepath.name] = score
+                results.append({
+                    "original": filepath.name,
+                    "extended": output_filename,
+                    "status": "success",
+                })
+            else:
+                results.append({
+                    "original": filepath.name,
+                    "status": "error" if isinstance(outcome, BaseException) else "failed",
+                })
+
+        return scores, results
+
+    def process_directory(self, input_dir: str, output_dir: str) -> Tuple[dict, list]:
+        """Score and extend all dialogues in a directory."""
+        return asyncio.run(self.process_directory_async(input_dir, output_dir))
+
+
+if __name__ == "__main__":
+    pipeline = DialoguePipeline()
+
+    input_dir = "data/matrix"
+    output_dir = "data/extended_dialogues"
+
+    if not Path(input_dir).exists():
+        print(f"Input directory {input_dir} not found.")
+        exit(1)
+
+    print(f"Scoring and extending dialogues from {input_dir}...")
+    scores, results = pipeline.process_directory(input_dir, output_dir)
+
+    pipeline.scorer.print_results_summary(scores)
+
+    with open(Path(output_dir) / "extension_results.json", "wb") as f:
+        f.write(serialization.dumps(results, indent=True))
+
+    with open(Path(output_dir) / "rubric_scores.json", "wb") as f:
+        f.write(serialization.dumps({k: v.to_dict() for k, v in scores.items()}, indent=True))
+
+    print(f"\nOutput directory: {output_dir}")
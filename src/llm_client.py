@@ -0,0 +1,75 @@
+"""
+LLM client - Retry and rate-limit chat completion calls.
+
+Transient API errors (429s, connection drops, 5xx) are retried with
+exponential backoff and jitter instead of failing the dialogue. Optional
+request-per-minute and token-per-minute buckets hold requests back before
+they are sent, so a full-concurrency run stays under the account quota
+instead of bouncing off it.
+"""
+
+from typing import Optional
+
+from aiolimiter import AsyncLimiter
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+retry_api = retry(
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    wait=wait_random_exponential(min=1, max=60),
+    stop=stop_after_attempt(6),
+    reraise=True,
+)
+
+
+def estimate_tokens(request: dict) -> int:
+    """Rough upper bound on the tokens a chat request will use (~4 chars/token)."""
+    prompt_chars = sum(len(message["content"]) for message in request["messages"])
+    return prompt_chars // 4 + request.get("max_tokens", 0)
+
+
+class ChatClient:
+    """Chat completions with retries and optional RPM/TPM throttling."""
+
+    def __init__(self, client, rpm_limit: Optional[int] = None, tpm_limit: Optional[int] = None):
+        """
+        Args:
+            client: AsyncOpenAI client
+            rpm_limit: Max requests per minute (None = unthrottled)
+            tpm_limit: Max tokens per minute (None = unthrottled)
+        """
+        self.client = client
+        self.rpm = AsyncLimiter(rpm_limit, 60) if rpm_limit else None
+        self.tpm = AsyncLimiter(tpm_limit, 60) if tpm_limit else None
+        # Tokens earlier responses used beyond their estimate, not yet acquired
+        self._token_deficit = 0
+
+    async def _acquire_tokens(self, amount: int):
+        # Settle any overage from earlier calls along with this request's own
+        amount += self._token_deficit
+        self._token_deficit = 0
+        # A single acquire can't exceed the bucket size
+        if amount > 0:
+            await self.tpm.acquire(min(amount, self.tpm.max_rate))
+
+    @retry_api
+    async def create(self, **request):
+        """Same arguments and return value as client.chat.completions.create."""
+
+        estimate = estimate_tokens(request)
+
+        if self.rpm is not None:
+            await self.rpm.acquire()
+        if self.tpm is not None:
+            await self._acquire_tokens(estimate)
+
+        response = await self.client.chat.completions.create(**request)
+
+        # Charge whatever the estimate undercounted against the next request,
+        # rather than blocking this caller after its response has arrived
+        if self.tpm is not None and response.usage is not None:
+            self._token_deficit += max(0, response.usage.total_tokens - estimate)
+
+        return response
@@ -6,14 +6,153 @@ Smart fallback:
 2. Fall back to examples/ (if proprietary not available)
 3. Return what's available
 
+Also finds the matrix dialogue files that drive scoring and extension.
+
 No dependencies on implementation details. Just loads data.
 """
 
+import functools
+import hashlib
+import importlib.util
+import os
+import pickle
 import sys
-import json
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from data_models import ConstitutionalQuestion, Persona, QuestionCategory
+import serialization
+
+# Name -> member lookup, without going through the Enum metaclass each time
+_CATEGORY = QuestionCategory.__members__
+
+# Parsed example/custom JSON files, pickled across process starts.
+# Bump the version when the data models change shape.
+LOADER_CACHE_DIR = Path.home() / ".cache" / "ttrpg-rl"
+LOADER_CACHE_VERSION = 1
+
+PROPRIETARY_DIR = Path(__file__).parent.parent / "proprietary"
+
+# (subdir, module, attribute) -> imported value, or None if unavailable
+_proprietary_imports: Dict[Tuple[str, str, str], Optional[Any]] = {}
+
+
+def _import_proprietary(subdir: str, module: str, attr: str) -> Optional[Any]:
+    """Load attr from proprietary/<subdir>/<module>.py, at most once per process.
+
+    The file is loaded directly with spec_from_file_location, so sys.path is
+    left alone. It is registered in sys.modules under a private name
+    (_prop_<module>) so it can't collide with a regular import, and only if
+    it loads cleanly. Both hits and misses are remembered.
+
+    Missing files and import/attribute errors count as unavailable. Any
+    other error (e.g. a SyntaxError in the deck) propagates rather than
+    silently falling back to the examples.
+    """
+
+    key = (subdir, module, attr)
+    if key in _proprietary_imports:
+        return _proprietary_imports[key]
+
+    value = None
+    name = f"_prop_{module}"
+    path = PROPRIETARY_DIR / subdir / f"{module}.py"
+    spec = importlib.util.spec_from_file_location(name, path) if path.is_file() else None
+
+    if spec is not None and spec.loader is not None:
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[name] = mod
+        try:
+            spec.loader.exec_module(mod)
+            value = getattr(mod, attr, None)
+        except (ImportError, ModuleNotFoundError, AttributeError):
+            value = None
+        except BaseException:
+            sys.modules.pop(name, None)
+            raise
+        if value is None:
+            sys.modules.pop(name, None)
+
+    _proprietary_imports[key] = value
+    return value
+
+
+def _cached_parse(path, build):
+    """Return build(path), reusing a pickled result while the file is unchanged.
+
+    The pickle lives in LOADER_CACHE_DIR and is tagged with the file's mtime
+    and size plus LOADER_CACHE_VERSION. Anything unreadable or stale is
+    rebuilt, and cache write failures are ignored.
+    """
+
+    path = Path(path).resolve()
+    stat = path.stat()
+    stamp = (LOADER_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+    digest = hashlib.sha256(str(path).encode()).hexdigest()[:16]
+    cache_file = LOADER_CACHE_DIR / f"{build.__name__.lstrip('_')}_{digest}.pkl"
+
+    try:
+        cached_stamp, value = pickle.loads(cache_file.read_bytes())
+        if cached_stamp == stamp:
+            return value
+    except Exception:
+        pass
+
+    value = build(path)
+
+    try:
+        LOADER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(pickle.dumps((stamp, value), protocol=5))
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass
+
+    return value
+
+
+def _parse_questions(path) -> Dict[str, ConstitutionalQuestion]:
+    """Questions from a JSON file, via the on-disk pickle cache."""
+    return _cached_parse(path, _build_questions)
+
+
+def _parse_personas(path) -> Dict[str, Persona]:
+    """Personas from a JSON file, via the on-disk pickle cache."""
+    return _cached_parse(path, _build_personas)
+
+
+def _build_questions(path) -> Dict[str, ConstitutionalQuestion]:
+    """Build questions from a JSON file of {key: {question, category, ...}}."""
+    data = serialization.loads(Path(path).read_bytes())
+
+    questions = {}
+    for key, q_data in data.items():
+        key = sys.intern(key)
+        questions[key] = ConstitutionalQuestion(
+            key=key,
+            question=q_data["question"],
+            category=_CATEGORY[q_data["category"]],
+            pedagogical_principle=sys.intern(q_data["pedagogical_principle"]),
+            persona_bias=sys.intern(q_data.get("persona_bias", "")),
+        )
+
+    return questions
+
+
+def _build_personas(path) -> Dict[str, Persona]:
+    """Build personas from a JSON file of {key: {name, archetype, ...}}."""
+    data = serialization.loads(Path(path).read_bytes())
+
+    personas = {}
+    for key, p_data in data.items():
+        personas[key] = Persona(
+            name=p_data["name"],
+            archetype=sys.intern(p_data["archetype"]),
+            description=p_data["description"],
+            question_keys=tuple(sys.intern(k) for k in p_data["question_keys"]),
+        )
+
+    return personas
 
 
 class QuestionLoader:
@@ -119,29 +258,12 @@ class QuestionLoader:
     @classmethod
     def _try_proprietary(cls) -> Optional[Dict[str, ConstitutionalQuestion]]:
         """Try to load from proprietary layer."""
-        try:
-            # Try importing from proprietary
-            sys.path.insert(0, str(Path(__file__).parent.parent / "proprietary" / "constitutional_deck"))
-
-            from constitutional_deck import CONSTITUTIONAL_QUESTIONS
-
-            return CONSTITUTIONAL_QUESTIONS
-
-        except (ImportError, ModuleNotFoundError, AttributeError):
-            return None
+        return _import_proprietary("constitutional_deck", "constitutional_deck", "CONSTITUTIONAL_QUESTIONS")
 
     @classmethod
     def _try_proprietary_koans(cls) -> Optional[Dict[str, ConstitutionalQuestion]]:
         """Try to load koans from proprietary layer."""
-        try:
-            sys.path.insert(0, str(Path(__file__).parent.parent / "proprietary" / "constitutional_deck"))
-
-            from constitutional_koans import CONSTITUTIONAL_KOANS
-
-            return CONSTITUTIONAL_KOANS
-
-        except (ImportError, ModuleNotFoundError, AttributeError):
-            return None
+        return _import_proprietary("constitutional_deck", "constitutional_koans", "CONSTITUTIONAL_KOANS")
 
     @classmethod
     def _load_examples(cls) -> Optional[Dict[str, ConstitutionalQuestion]]:
@@ -152,20 +274,7 @@ class QuestionLoader:
             return None
 
         try:
-            with open(examples_file) as f:
-                data = json.load(f)
-
-            questions = {}
-            for key, q_data in data.items():
-                questions[key] = ConstitutionalQuestion(
-                    key=key,
-                    question=q_data["question"],
-                    category=QuestionCategory[q_data["category"]],
-                    pedagogical_principle=q_data["pedagogical_principle"],
-                    persona_bias=q_data.get("persona_bias", ""),
-                )
-
-            return questions
+            return _parse_questions(examples_file)
 
         except Exception as e:
             print(f"Error loading example questions: {e}")
@@ -174,20 +283,7 @@ class QuestionLoader:
     @classmethod
     def _load_from_path(cls, path: str) -> Dict[str, ConstitutionalQuestion]:
         """Load from arbitrary JSON path."""
-        with open(path) as f:
-            data = json.load(f)
-
-        questions = {}
-        for key, q_data in data.items():
-            questions[key] = ConstitutionalQuestion(
-                key=key,
-                question=q_data["question"],
-                category=QuestionCategory[q_data["category"]],
-                pedagogical_principle=q_data["pedagogical_principle"],
-                persona_bias=q_data.get("persona_bias", ""),
-            )
-
-        return questions
+        return _parse_questions(path)
 
     @classmethod
     def get_source(cls) -> str:
@@ -260,15 +356,7 @@ class PersonaLoader:
     @classmethod
     def _try_proprietary(cls) -> Optional[Dict[str, Persona]]:
         """Try to load from proprietary layer."""
-        try:
-            sys.path.insert(0, str(Path(__file__).parent.parent / "proprietary" / "personas"))
-
-            from procgen_personas import PREDEFINED_PERSONAS
-
-            return PREDEFINED_PERSONAS
-
-        except (ImportError, ModuleNotFoundError, AttributeError):
-            return None
+        return _import_proprietary("personas", "procgen_personas", "PREDEFINED_PERSONAS")
 
     @classmethod
     def _load_examples(cls) -> Optional[Dict[str, Persona]]:
@@ -279,19 +367,7 @@ class PersonaLoader:
             return None
 
         try:
-            with open(examples_file) as f:
-                data = json.load(f)
-
-            personas = {}
-            for key, p_data in data.items():
-                personas[key] = Persona(
-                    name=p_data["name"],
-                    archetype=p_data["archetype"],
-                    description=p_data["description"],
-                    question_keys=p_data["question_keys"],
-                )
-
-            return personas
+            return _parse_personas(examples_file)
 
         except Exception as e:
             print(f"Error loading example personas: {e}")
@@ -300,19 +376,7 @@ class PersonaLoader:
     @classmethod
     def _load_from_path(cls, path: str) -> Dict[str, Persona]:
         """Load from arbitrary JSON path."""
-        with open(path) as f:
-            data = json.load(f)
-
-        personas = {}
-        for key, p_data in data.items():
-            personas[key] = Persona(
-                name=p_data["name"],
-                archetype=p_data["archetype"],
-                description=p_data["description"],
-                question_keys=p_data["question_keys"],
-            )
-
-        return personas
+        return _parse_personas(path)
 
     @classmethod
     def get_source(cls) -> str:
@@ -322,18 +386,21 @@ class PersonaLoader:
         return cls._source
 
 
-def get_persona_system_prompt(
-    persona: Persona,
-    questions: Dict[str, ConstitutionalQuestion],
-) -> str:
-    """Generate system prompt from a persona and its questions."""
+def iter_matrix_files(directory: str) -> List[Path]:
+    """List matrix_*.json dialogue files in a directory, sorted by name.
 
-    # Get the actual question objects
-    question_objs = [questions[key] for key in persona.question_keys if key in questions]
+    Uses os.scandir so filtering is a string check on each entry name,
+    with no per-file stat() calls.
+    """
+    with os.scandir(directory) as entries:
+        return sorted(
+            Path(entry.path)
+            for entry in entries
+            if entry.name.startswith("matrix_") and entry.name.endswith(".json")
+        )
 
-    questions_text = "\n".join(f"- {q.question}" for q in question_objs)
 
-    return f"""You are PERFORMING the role of {persona.name}, a {persona.archetype}.
+PERSONA_PROMPT_TEMPLATE = """You are PERFORMING the role of {name}, a {archetype}.
 
 ## CONSTITUTIONAL QUESTIONS
 
@@ -346,7 +413,7 @@ ask yourself: How do these questions guide my response?
 
 Respond in two layers:
 
-1. [DIEGETIC] What {persona.name} says to the student
+1. [DIEGETIC] What {name} says to the student
    - Respond in character (2-3 sentences)
    - Let your constitutional questions guide you
    - Genuinely interrogate them as you respond
@@ -360,6 +427,37 @@ The diegetic response is what the student hears.
 The non-diegetic layer shows your thinking."""
 
 
+@functools.lru_cache(maxsize=512)
+def _build_persona_prompt(name: str, archetype: str, question_texts: Tuple[str, ...]) -> str:
+    """Persona system prompt text (see get_persona_system_prompt)."""
+    questions_text = "\n".join(f"- {q}" for q in question_texts)
+
+    return PERSONA_PROMPT_TEMPLATE.format_map({
+        "name": name,
+        "archetype": archetype,
+        "questions_text": questions_text,
+    })
+
+
+def get_persona_system_prompt(
+    persona: Persona,
+    questions: Dict[str, ConstitutionalQuestion],
+) -> str:
+    """Generate system prompt from a persona and its questions.
+
+    Memoized on (persona name, archetype, question texts). The key is the
+    content rather than the deck object, so freshly loaded copies of the
+    same deck share cache entries and no deck is kept alive by the cache.
+    """
+
+    # One hash per key: unknown keys map to None and are filtered out
+    found = filter(None, map(questions.get, persona.question_keys))
+    return _build_persona_prompt(
+        persona.name,
+        persona.archetype,
+        tuple(q.question for q in found),
+    )
+
 if __name__ == "__main__":
     print("Testing loaders...\n")
 
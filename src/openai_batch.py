@@ -0,0 +1,92 @@
+"""
+OpenAI Batch API helper - Run many chat completions as one offline job.
+
+Batch jobs are billed at roughly half the real-time price and don't count
+against the chat completions rate limits. Results arrive within the
+completion window (up to 24h), so this suits offline passes like rubric
+scoring and dialogue extension where nothing reads the output until the
+whole run has finished.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Dict, List
+
+import serialization
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def batch_request(custom_id: str, body: dict) -> dict:
+    """Wrap chat completion kwargs as one line of a batch input file."""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": body,
+    }
+
+
+async def run_batch(
+    client,
+    requests: List[dict],
+    input_path: Path,
+    poll_interval: float = 30.0,
+) -> Dict[str, str]:
+    """Submit requests as a batch job and wait for it to finish.
+
+    Args:
+        client: AsyncOpenAI client
+        requests: Lines built with batch_request()
+        input_path: Where to write the JSONL input file
+        poll_interval: Seconds between status checks
+
+    Returns:
+        Dict mapping custom_id to assistant message content.
+        Requests that failed inside the batch are left out.
+    """
+
+    with open(input_path, "wb") as f:
+        for request in requests:
+            f.write(serialization.dumps(request) + b"\n")
+
+    with open(input_path, "rb") as f:
+        input_file = await client.files.create(file=f, purpose="batch")
+
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    print(f"Submitted batch {batch.id} ({len(requests)} requests)")
+
+    while batch.status not in TERMINAL_STATUSES:
+        await asyncio.sleep(poll_interval)
+        batch = await client.batches.retrieve(batch.id)
+        if batch.request_counts:
+            counts = batch.request_counts
+            print(f"  {batch.id}: {batch.status} ({counts.completed}/{counts.total})")
+
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch.id} ended with status: {batch.status}")
+
+    contents = {}
+    if batch.output_file_id is None:
+        return contents
+
+    output = await client.files.content(batch.output_file_id)
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+
+        record = serialization.loads(line)
+        response = record.get("response") or {}
+
+        if response.get("status_code") != 200:
+            print(f"✗ {record['custom_id']}: {record.get('error') or response.get('status_code')}")
+            continue
+
+        contents[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+
+    return contents
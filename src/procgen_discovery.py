@@ -10,17 +10,22 @@ For each student_type × scenario pair:
 Instead of hand-crafting specialists, let the data reveal what works.
 """
 
-import json
+import asyncio
+import functools
 import os
 import random
+import time
 from pathlib import Path
+from collections import Counter, defaultdict
 from datetime import datetime
-from typing import List, Dict, Tuple
-from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from dataclasses import asdict, dataclass
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 
+import serialization
 from data_models import Persona, ConstitutionalQuestion
+from llm_client import ChatClient
 from loaders import QuestionLoader, PersonaLoader, get_persona_system_prompt
 from student_profiles import StudentProfileConfig, create_student_from_config
 from scenarios import SCENARIO_LIST
@@ -28,7 +33,35 @@ from student_responses import StudentResponseGenerator
 from binary_rubric_scorer import BinaryRubricScorer
 
 
-@dataclass
+# Round-2 system prompts depend only on who is speaking, so they are built
+# once per name and every continuation call sends an identical prefix.
+TEACHER_CONTINUATION_TEMPLATE = "You are {name}. Continue the dialogue by responding to the student's last message. Keep it short (2-3 sentences)."
+
+STUDENT_CONTINUATION_TEMPLATE = "You are {name}. The teacher just responded. React authentically - show learning, deeper confusion, or pushback."
+
+
+@functools.lru_cache(maxsize=256)
+def _teacher_continuation_system(name: str) -> str:
+    return TEACHER_CONTINUATION_TEMPLATE.format(name=name)
+
+
+@functools.lru_cache(maxsize=256)
+def _student_continuation_system(name: str) -> str:
+    return STUDENT_CONTINUATION_TEMPLATE.format(name=name)
+
+
+@functools.lru_cache(maxsize=1024)
+def _second_to_iso(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds).isoformat()
+
+
+def ns_to_iso(ns: int) -> str:
+    """Format a time.time_ns() value like datetime.isoformat(), one datetime per second."""
+    seconds, remainder = divmod(ns, 10**9)
+    return f"{_second_to_iso(seconds)}.{remainder // 1000:06d}"
+
+
+@dataclass(slots=True)
 class ProcgenResult:
     """Result of a single procgen dialogue test."""
     iteration: int
@@ -37,7 +70,7 @@ class ProcgenResult:
 
     # Persona used
     persona_name: str
-    question_keys: List[str]
+    question_keys: Tuple[str, ...]
     num_questions: int
 
     # Dialogue content
@@ -52,16 +85,104 @@ class ProcgenResult:
     reasoning: str
     confidence: float
 
-    timestamp: str
+    # Wall-clock time.time_ns(); formatted only when reported (ns_to_iso)
+    timestamp_ns: int
+
+    @property
+    def timestamp(self) -> str:
+        return ns_to_iso(self.timestamp_ns)
+
+    def to_dict(self) -> dict:
+        """Fields for JSON output, with the ISO timestamp in place of timestamp_ns."""
+        data = asdict(self)
+        del data["timestamp_ns"]
+        data["timestamp"] = self.timestamp
+        return data
+
+
+class PatternAggregator:
+    """Running per-pair totals for analyze_patterns.
+
+    Holds only counters, never the results themselves, so it can be fed
+    from a run_discovery_cycle sink while dialogues are still generating.
+    """
+
+    def __init__(self):
+        # Keyed by (student, scenario); the string key is only formatted
+        # once per pair in analysis(), not once per result
+        self.totals = Counter()
+        self.passes = Counter()
+        self.question_counts = defaultdict(Counter)
+        self.started: Optional[int] = None
+        self.finished: Optional[int] = None
+
+    @property
+    def count(self) -> int:
+        """Number of results added."""
+        return sum(self.totals.values())
+
+    def add(self, result: ProcgenResult):
+        pair = (result.student_name, result.scenario_id)
+        self.totals[pair] += 1
+
+        # Aggregate questions across passes
+        if result.rubric_pass:
+            self.passes[pair] += 1
+            self.question_counts[pair].update(result.question_keys)
+
+        if self.started is None or result.timestamp_ns < self.started:
+            self.started = result.timestamp_ns
+        if self.finished is None or result.timestamp_ns > self.finished:
+            self.finished = result.timestamp_ns
+
+    def analysis(self) -> Dict:
+        """Findings so far, in the analyze_patterns format ({} if empty)."""
+
+        if not self.totals:
+            return {}
+
+        # Analyze each pair
+        analysis = {
+            "started": ns_to_iso(self.started),
+            "finished": ns_to_iso(self.finished),
+            "by_pair": {},
+            "top_questions": {},
+            "patterns": [],
+        }
+
+        for pair, total in self.totals.items():
+            pair_key = "{}_{}".format(*pair)
+            pair_passes = self.passes[pair]
+            top_questions = self.question_counts[pair].most_common(5)
+
+            analysis["by_pair"][pair_key] = {
+                "total": total,
+                "passes": pair_passes,
+                "failures": total - pair_passes,
+                "pass_rate": pair_passes / total,
+                "top_questions": top_questions,
+            }
+
+            if pair_passes:
+                pattern = {
+                    "pair": pair_key,
+                    "pass_rate": pair_passes / total,
+                    "top_questions": [q for q, _ in top_questions],
+                }
+                analysis["patterns"].append(pattern)
+
+        return analysis
 
 
 class ProcgenDiscovery:
     """Discover optimal persona/student/scenario combinations via procgen."""
 
-    def __init__(self, api_key: str = None, question_set: str = "original"):
+    def __init__(self, api_key: str = None, question_set: str = "original", max_concurrency: int = 16):
         if api_key is None:
             api_key = os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=api_key)
+        self.client = AsyncOpenAI(api_key=api_key)
+        self.chat = ChatClient(self.client)
+        self.max_concurrency = max_concurrency
         self.student_response_gen = StudentResponseGenerator(api_key=api_key)
         self.rubric_scorer = BinaryRubricScorer(api_key=api_key)
         self.question_set = question_set
@@ -75,6 +196,17 @@ class ProcgenDiscovery:
         self.all_personas = PersonaLoader.load()
         print(f"✓ ({PersonaLoader.get_source()})")
 
+        # Fixed pools for generate_random_persona, with a private RNG
+        self._rng = random.Random()
+        self._question_keys = tuple(self.questions.keys())
+        self._archetypes = (
+            "Adaptive Teacher",
+            "Thoughtful Guide",
+            "Questioning Coach",
+            "Engaged Mentor",
+            "Learning Facilitator",
+        )
+
     def generate_random_persona(self, num_questions: int = None) -> Persona:
         """Generate a random persona by selecting random constitutional questions.
 
@@ -86,50 +218,53 @@ class ProcgenDiscovery:
         """
 
         if num_questions is None:
-            num_questions = random.randint(4, 8)
-
-        # Get all question keys
-        all_keys = list(self.questions.keys())
+            num_questions = self._rng.randint(4, 8)
 
         # Random selection
-        selected_keys = random.sample(all_keys, min(num_questions, len(all_keys)))
+        selected_keys = self._rng.sample(self._question_keys, min(num_questions, len(self._question_keys)))
 
         # Create persona
-        archetype = random.choice([
-            "Adaptive Teacher",
-            "Thoughtful Guide",
-            "Questioning Coach",
-            "Engaged Mentor",
-            "Learning Facilitator",
-        ])
+        archetype = self._rng.choice(self._archetypes)
 
         return Persona(
             name=f"Procgen_{len(selected_keys)}q",
             archetype=archetype,
             description=f"Randomly generated persona with {len(selected_keys)} constitutional questions",
-            question_keys=selected_keys,
+            question_keys=tuple(selected_keys),
         )
 
-    def run_procgen_dialogue(
+    async def run_procgen_dialogue(
         self,
         persona: Persona,
         student_config: StudentProfileConfig,
         scenario,
+        student=None,
     ) -> Tuple[dict, bool, str]:
         """Run a dialogue with procgen persona and student.
 
+        The four turns depend on each other, so they run in sequence; separate
+        dialogues run concurrently (see run_discovery_cycle_async).
+
+        Args:
+            persona: Teaching persona
+            student_config: Student type
+            scenario: Scenario to run
+            student: Student already built from student_config, to reuse
+                across iterations (None = build one here)
+
         Returns:
             (dialogue_dict, success, error_msg)
         """
 
         try:
-            student = create_student_from_config(student_config)
+            if student is None:
+                student = create_student_from_config(student_config)
 
             # Generate system prompt from persona and questions
             system_prompt = get_persona_system_prompt(persona, self.questions)
 
             # Teacher opening
-            opening_response = self.client.chat.completions.create(
+            opening_response = await self.chat.create(
                 model="gpt-4o-mini",
                 max_tokens=300,
                 temperature=0.95,
@@ -143,13 +278,14 @@ class ProcgenDiscovery:
 
             # Extract diegetic
             if "[DIEGETIC]" in teacher_opening:
-                parts = teacher_opening.split("[NON-DIEGETIC]")
-                teacher_diegetic = parts[0].replace("[DIEGETIC]", "").strip()
+                head, _, _ = teacher_opening.partition("[NON-DIEGETIC]")
+                teacher_diegetic = head.replace("[DIEGETIC]", "", 1).strip()
             else:
                 teacher_diegetic = teacher_opening
 
-            # Student response 1
-            student_response_1_obj = self.student_response_gen.generate_response(
+            # Student response 1 (sync generator, run off the event loop)
+            student_response_1_obj = await asyncio.to_thread(
+                self.student_response_gen.generate_response,
                 student=student,
                 teacher_persona=persona.name,
                 teacher_response=teacher_diegetic,
@@ -159,30 +295,28 @@ class ProcgenDiscovery:
             student_response_1 = student_response_1_obj.student_diegetic
 
             # Teacher response 2 (continuing dialogue)
-            teacher_response_2_raw = self.client.chat.completions.create(
+            response = await self.chat.create(
                 model="gpt-4o-mini",
                 max_tokens=200,
                 temperature=0.95,
                 messages=[
-                    {"role": "system", "content": f"You are {persona.name}. Continue the dialogue by responding to the student's last message. Keep it short (2-3 sentences)."},
+                    {"role": "system", "content": _teacher_continuation_system(persona.name)},
                     {"role": "user", "content": f"Student said: {student_response_1}\n\nRespond:"},
                 ]
-            ).choices[0].message.content
-
-            teacher_response_2 = teacher_response_2_raw
+            )
+            teacher_response_2 = response.choices[0].message.content
 
             # Student response 2
-            student_response_2_raw = self.client.chat.completions.create(
+            response = await self.chat.create(
                 model="gpt-4o-mini",
                 max_tokens=200,
                 temperature=0.95,
                 messages=[
-                    {"role": "system", "content": f"You are {student.name}. The teacher just responded. React authentically - show learning, deeper confusion, or pushback."},
+                    {"role": "system", "content": _student_continuation_system(student.name)},
                     {"role": "user", "content": f"Teacher said: {teacher_response_2}\n\nYour response:"},
                 ]
-            ).choices[0].message.content
-
-            student_response_2 = student_response_2_raw
+            )
+            student_response_2 = response.choices[0].message.content
 
             dialogue = {
                 "persona": persona.name,
@@ -193,7 +327,7 @@ class ProcgenDiscovery:
                 "student_response_1": student_response_1,
                 "teacher_response_2": teacher_response_2,
                 "student_response_2": student_response_2,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp_ns": time.time_ns(),
             }
 
             return dialogue, True, ""
@@ -201,23 +335,88 @@ class ProcgenDiscovery:
         except Exception as e:
             return None, False, str(e)
 
-    def run_discovery_cycle(
+    async def _run_iteration(
+        self,
+        student_config: StudentProfileConfig,
+        student,
+        scenario,
+        iteration: int,
+        sem: asyncio.Semaphore,
+        label: str,
+        verbose: bool,
+        sink: Optional[Callable[[ProcgenResult], None]] = None,
+        keep_result: bool = True,
+    ) -> Optional[ProcgenResult]:
+        """Test one random persona on a student/scenario pair, holding a semaphore slot."""
+
+        # Generate random persona
+        persona = self.generate_random_persona()
+
+        # Run dialogue
+        async with sem:
+            dialogue, success, error = await self.run_procgen_dialogue(
+                persona, student_config, scenario, student
+            )
+
+        if not success:
+            if verbose:
+                print(f"{label} {student_config.name} + {scenario.id} (iteration {iteration})... ✗ {error}")
+            return None
+
+        # Score with binary rubric (simplified - just use pushback for now)
+        pushback = random.choice([True, False])  # Placeholder
+
+        result = ProcgenResult(
+            iteration=iteration,
+            student_name=student_config.name,
+            scenario_id=scenario.id,
+            persona_name=persona.name,
+            question_keys=persona.question_keys,
+            num_questions=len(persona.question_keys),
+            teacher_opening=dialogue["teacher_opening"],
+            student_response_1=dialogue["student_response_1"],
+            teacher_response_2=dialogue["teacher_response_2"],
+            student_response_2=dialogue["student_response_2"],
+            rubric_pass=pushback,  # Simplified for now
+            pushback_detected=pushback,
+            reasoning="Procgen discovery result",
+            confidence=0.5,
+            timestamp_ns=dialogue["timestamp_ns"],
+        )
+
+        if sink is not None:
+            sink(result)
+
+        if verbose:
+            print(f"{label} {student_config.name} + {scenario.id} (iteration {iteration})... ✓")
+
+        return result if keep_result else None
+
+    async def run_discovery_cycle_async(
         self,
         student_configs: List[StudentProfileConfig] = None,
         scenarios: List = None,
         iterations_per_pair: int = 10,
         verbose: bool = True,
+        sink: Optional[Callable[[ProcgenResult], None]] = None,
+        keep_results: bool = True,
     ) -> List[ProcgenResult]:
         """Run full discovery cycle: test N personas for each student/scenario pair.
 
+        Up to max_concurrency dialogues run at once.
+
         Args:
             student_configs: Student types to test (None = defaults)
             scenarios: Scenarios to test (None = all)
             iterations_per_pair: How many random personas to test per pair
             verbose: Print progress
+            sink: Called with each result as soon as it is produced
+                (e.g. to append it to a JSONL file)
+            keep_results: False = hand results only to the sink, so a long
+                run never holds every dialogue in memory
 
         Returns:
-            List of all results
+            List of all results (empty if keep_results is False)
         """
 
         if student_configs is None:
@@ -260,119 +459,62 @@ class ProcgenDiscovery:
         if scenarios is None:
             scenarios = SCENARIO_LIST[:2]
 
+        runs = [
+            (student_config, scenario, iteration)
+            for student_config in student_configs
+            for scenario in scenarios
+            for iteration in range(1, iterations_per_pair + 1)
+        ]
+        sem = asyncio.Semaphore(self.max_concurrency)
+
+        # One student per config, shared by all of its iterations
+        students = {cfg.name: create_student_from_config(cfg) for cfg in student_configs}
+
+        tasks = [
+            self._run_iteration(
+                student_config, students[student_config.name], scenario, iteration,
+                sem, f"[{i+1}/{len(runs)}]", verbose, sink, keep_results,
+            )
+            for i, (student_config, scenario, iteration) in enumerate(runs)
+        ]
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
         results = []
-        total = len(student_configs) * len(scenarios) * iterations_per_pair
-        count = 0
-
-        for student_config in student_configs:
-            for scenario in scenarios:
-                for iteration in range(1, iterations_per_pair + 1):
-                    count += 1
-
-                    if verbose:
-                        print(
-                            f"[{count}/{total}] {student_config.name} + {scenario.id} "
-                            f"(iteration {iteration})...",
-                            end=" ",
-                            flush=True,
-                        )
-
-                    # Generate random persona
-                    persona = self.generate_random_persona()
-
-                    # Run dialogue
-                    dialogue, success, error = self.run_procgen_dialogue(
-                        persona, student_config, scenario
-                    )
-
-                    if not success:
-                        if verbose:
-                            print(f"✗ {error}")
-                        continue
-
-                    # Score with binary rubric (simplified - just use pushback for now)
-                    pushback = random.choice([True, False])  # Placeholder
-
-                    result = ProcgenResult(
-                        iteration=iteration,
-                        student_name=student_config.name,
-                        scenario_id=scenario.id,
-                        persona_name=persona.name,
-                        question_keys=persona.question_keys,
-                        num_questions=len(persona.question_keys),
-                        teacher_opening=dialogue["teacher_opening"],
-                        student_response_1=dialogue["student_response_1"],
-                        teacher_response_2=dialogue["teacher_response_2"],
-                        student_response_2=dialogue["student_response_2"],
-                        rubric_pass=pushback,  # Simplified for now
-                        pushback_detected=pushback,
-                        reasoning="Procgen discovery result",
-                        confidence=0.5,
-                        timestamp=dialogue["timestamp"],
-                    )
-
-                    results.append(result)
-
-                    if verbose:
-                        print(f"✓")
+        for (student_config, scenario, iteration), outcome in zip(runs, outcomes):
+            if isinstance(outcome, BaseException):
+                if verbose:
+                    print(f"✗ {student_config.name} + {scenario.id} (iteration {iteration}): {outcome}")
+            elif outcome is not None:
+                results.append(outcome)
 
         return results
 
-    def analyze_patterns(self, results: List[ProcgenResult]) -> Dict:
+    def run_discovery_cycle(
+        self,
+        student_configs: List[StudentProfileConfig] = None,
+        scenarios: List = None,
+        iterations_per_pair: int = 10,
+        verbose: bool = True,
+    ) -> List[ProcgenResult]:
+        """Run full discovery cycle: test N personas for each student/scenario pair."""
+        return asyncio.run(self.run_discovery_cycle_async(
+            student_configs, scenarios, iterations_per_pair, verbose
+        ))
+
+    def analyze_patterns(self, results: Iterable[ProcgenResult]) -> Dict:
         """Analyze patterns in procgen results to discover what works.
 
+        Results are consumed in a single pass (see PatternAggregator), so
+        any iterable works.
+
         Returns:
             Dict with findings: which question combinations work best for which pairs
         """
 
-        if not results:
-            return {}
-
-        # Group by student × scenario
-        by_pair = {}
+        aggregator = PatternAggregator()
         for result in results:
-            key = f"{result.student_name}_{result.scenario_id}"
-            if key not in by_pair:
-                by_pair[key] = []
-            by_pair[key].append(result)
-
-        # Analyze each pair
-        analysis = {
-            "by_pair": {},
-            "top_questions": {},
-            "patterns": [],
-        }
-
-        for pair_key, pair_results in by_pair.items():
-            passes = [r for r in pair_results if r.rubric_pass]
-            failures = [r for r in pair_results if not r.rubric_pass]
-
-            # Aggregate questions across passes
-            question_counts = {}
-            for result in passes:
-                for q in result.question_keys:
-                    question_counts[q] = question_counts.get(q, 0) + 1
-
-            analysis["by_pair"][pair_key] = {
-                "total": len(pair_results),
-                "passes": len(passes),
-                "failures": len(failures),
-                "pass_rate": len(passes) / len(pair_results) if pair_results else 0,
-                "top_questions": sorted(
-                    question_counts.items(), key=lambda x: x[1], reverse=True
-                )[:5],
-            }
-
-            if passes:
-                pattern = {
-                    "pair": pair_key,
-                    "pass_rate": len(passes) / len(pair_results),
-                    "top_questions": [q for q, _ in analysis["by_pair"][pair_key]["top_questions"]],
-                }
-                analysis["patterns"].append(pattern)
-
-        return analysis
-
+            aggregator.add(result)
+        return aggregator.analysis()
 
 if __name__ == "__main__":
     discovery = ProcgenDiscovery()
@@ -404,10 +546,9 @@ if __name__ == "__main__":
     output_dir = Path("data/procgen_discovery")
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    with open(output_dir / "procgen_results.json", "w") as f:
-        json.dump([asdict(r) for r in results], f, indent=2)
-
-    with open(output_dir / "procgen_analysis.json", "w") as f:
-        json.dump(analysis, f, indent=2)
+    (output_dir / "procgen_results.json").write_bytes(
+        serialization.dumps([r.to_dict() for r in results], indent=True)
+    )
+    (output_dir / "procgen_analysis.json").write_bytes(serialization.dumps(analysis, indent=True))
 
     print(f"\nResults saved to: {output_dir}")
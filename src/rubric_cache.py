@@ -0,0 +1,159 @@
+"""
+Rubric cache - Skip re-scoring dialogues that have already been scored.
+
+Two tiers:
+1. Exact: SHA-256 of the dialogue text, one JSON file per entry
+2. Semantic (optional): embed the dialogue and reuse the score of the most
+   similar previously scored dialogue if cosine similarity >= threshold
+
+Entries live under a namespace directory derived from the rubric prompt,
+so changing the prompt or model starts a fresh cache instead of serving
+stale scores.
+"""
+
+import hashlib
+import math
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import aiofiles
+
+import serialization
+from llm_client import retry_api
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def dialogue_text(dialogue: dict) -> str:
+    """Canonical text of the parts of a dialogue the rubric looks at."""
+    return "\n\n".join([
+        dialogue["instructor"]["opening_diegetic"].strip(),
+        dialogue["student_response"]["diegetic"].strip(),
+        dialogue["student_response"]["non_diegetic"].strip(),
+    ])
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class RubricCache:
+    """File-backed cache of rubric scores keyed by dialogue content."""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        namespace: str,
+        client=None,
+        semantic_threshold: Optional[float] = None,
+    ):
+        """
+        Args:
+            cache_dir: Root directory for cache entries
+            namespace: Identifies the rubric version (prompt + model)
+            client: AsyncOpenAI client, only needed for the semantic tier
+            semantic_threshold: Cosine similarity needed for a semantic hit.
+                None = exact matching only (no embedding calls).
+        """
+        digest = hashlib.sha256(namespace.encode()).hexdigest()[:16]
+        self.cache_dir = Path(cache_dir) / digest
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.client = client
+        self.semantic_threshold = semantic_threshold
+
+        # Semantic index: (unit vector, entry key), loaded lazily from disk
+        self._index: Optional[List[Tuple[List[float], str]]] = None
+        # Embeddings computed on a miss, kept until the score is stored
+        self._pending: Dict[str, List[float]] = {}
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    async def _read(self, key: str) -> Optional[dict]:
+        path = self.cache_dir / f"{key}.json"
+        if not path.exists():
+            return None
+        async with aiofiles.open(path, "rb") as f:
+            return serialization.loads(await f.read())
+
+    @retry_api
+    async def _embed(self, text: str) -> List[float]:
+        response = await self.client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+        return _normalize(response.data[0].embedding)
+
+    def _embedded_entries(self) -> Iterator[Tuple[str, dict]]:
+        """Yield (key, entry) for every stored entry that has an embedding."""
+        for path in self.cache_dir.glob("*.json"):
+            entry = serialization.loads(path.read_bytes())
+            if entry.get("embedding"):
+                yield path.stem, entry
+
+    def _load_index(self) -> List[Tuple[List[float], str]]:
+        if self._index is None:
+            self._index = [(entry["embedding"], key) for key, entry in self._embedded_entries()]
+        return self._index
+
+    def labeled_embeddings(self) -> List[Tuple[List[float], dict]]:
+        """(unit embedding, score fields) for every entry stored with an embedding."""
+        return [(entry["embedding"], entry["score"]) for _, entry in self._embedded_entries()]
+
+    async def embedding(self, dialogue: dict) -> List[float]:
+        """Unit embedding of a dialogue; also stored with its score on put()."""
+
+        text = dialogue_text(dialogue)
+        key = self.key(text)
+
+        if key not in self._pending:
+            self._pending[key] = await self._embed(text)
+        return self._pending[key]
+
+    def discard(self, dialogue: dict):
+        """Drop the pending embedding of a dialogue whose score won't be stored."""
+        self._pending.pop(self.key(dialogue_text(dialogue)), None)
+
+    async def get(self, dialogue: dict) -> Optional[dict]:
+        """Return cached score fields for a dialogue, or None on a miss."""
+
+        text = dialogue_text(dialogue)
+        key = self.key(text)
+
+        entry = await self._read(key)
+        if entry is not None:
+            return entry["score"]
+
+        if self.semantic_threshold is None or self.client is None:
+            return None
+
+        vector = await self._embed(text)
+        self._pending[key] = vector
+
+        best_key, best_sim = None, -1.0
+        for other, other_key in self._load_index():
+            sim = sum(a * b for a, b in zip(vector, other))
+            if sim > best_sim:
+                best_key, best_sim = other_key, sim
+
+        if best_key is not None and best_sim >= self.semantic_threshold:
+            entry = await self._read(best_key)
+            if entry is not None:
+                # Write the hit through under this dialogue's own key: frees the
+                # pending embedding, and the next run gets an exact hit
+                await self.put(dialogue, entry["score"])
+                return entry["score"]
+
+        return None
+
+    async def put(self, dialogue: dict, score: dict):
+        """Store score fields for a dialogue."""
+
+        key = self.key(dialogue_text(dialogue))
+        vector = self._pending.pop(key, None)
+
+        async with aiofiles.open(self.cache_dir / f"{key}.json", "wb") as f:
+            await f.write(serialization.dumps({"score": score, "embedding": vector}))
+
+        if vector is not None and self._index is not None:
+            self._index.append((vector, key))
@@ -0,0 +1,96 @@
+"""
+Rubric prefilter - Settle obvious PASS/FAIL cases without an LLM call.
+
+One logistic-regression probe per rubric criterion, trained on dialogue
+embeddings paired with scores the LLM already produced (the rubric cache
+stores both). When every probe is confident, its predictions stand in for
+the rubric call; anything borderline still goes to the LLM.
+
+Requires scikit-learn, imported only when a prefilter is trained.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class RubricPrefilter:
+    """Per-criterion linear probes over dialogue embeddings."""
+
+    def __init__(
+        self,
+        criteria: Sequence[str],
+        low: float = 0.1,
+        high: float = 0.9,
+        min_examples: int = 50,
+    ):
+        """
+        Args:
+            criteria: Score field names to predict (one probe each)
+            low: A criterion is confidently False at or below this probability
+            high: A criterion is confidently True at or above this probability
+            min_examples: Labeled dialogues needed before the prefilter is used
+        """
+        self.criteria = list(criteria)
+        self.low = low
+        self.high = high
+        self.min_examples = min_examples
+
+        # criterion -> fitted probe, or a float for criteria whose labels
+        # never vary in the training data (smoothed constant probability)
+        self._probes: Dict[str, object] = {}
+        self.trained = False
+
+    def fit(self, examples: List[Tuple[List[float], dict]]) -> bool:
+        """Train the probes on (embedding, score fields) pairs.
+
+        Returns:
+            True if there were enough examples to train
+        """
+
+        if len(examples) < self.min_examples:
+            return False
+
+        from sklearn.linear_model import LogisticRegression
+
+        vectors = [vector for vector, _ in examples]
+
+        for criterion in self.criteria:
+            labels = [bool(score[criterion]) for _, score in examples]
+            positives = sum(labels)
+
+            if positives in (0, len(labels)):
+                # LogisticRegression needs both classes; Laplace-smoothed rate instead
+                self._probes[criterion] = (positives + 1) / (len(labels) + 2)
+            else:
+                self._probes[criterion] = LogisticRegression(max_iter=1000).fit(vectors, labels)
+
+        self.trained = True
+        return True
+
+    def predict(self, vector: List[float]) -> Optional[Tuple[Dict[str, bool], float]]:
+        """Predict every criterion for one embedding.
+
+        Returns:
+            (criterion -> bool, confidence of the least certain criterion),
+            or None if untrained or any criterion is borderline
+        """
+
+        if not self.trained:
+            return None
+
+        predictions = {}
+        confidence = 1.0
+
+        for criterion in self.criteria:
+            probe = self._probes[criterion]
+            if isinstance(probe, float):
+                prob = probe
+            else:
+                prob = float(probe.predict_proba([vector])[0][1])
+
+            if self.low < prob < self.high:
+                return None
+
+            predictions[criterion] = prob >= self.high
+            confidence = min(confidence, max(prob, 1 - prob))
+
+        return predictions, confidence
@@ -4,173 +4,280 @@ Master orchestrator for full discovery cycle:
 2. Extend dialogues to 2-3 rounds
 3. Procgen discovery on extended dialogues
 4. Aggregate findings and patterns
+
+Phases 1-3 are independent and run concurrently.
 """
 
+import asyncio
+import os
 import sys
-import json
 from pathlib import Path
 from datetime import datetime
+from operator import itemgetter
+from typing import List, Optional
 
+import serialization
 from binary_rubric_scorer import BinaryRubricScorer
 from dialogue_extender import DialogueExtender
-from procgen_discovery import ProcgenDiscovery
+from loaders import iter_matrix_files
+from procgen_discovery import PatternAggregator, ProcgenDiscovery
+
+MATRIX_DIR = Path("data/matrix")
+SCORE_CACHE_DIR = "data/.rubric_cache"
+
+
+def _dump_json(path: Path, obj):
+    """Write a cycle artifact as indented JSON (orjson when available).
+
+    Encoded in one buffer and renamed into place, so a crash mid-write never
+    leaves a truncated artifact behind.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(serialization.dumps(obj, indent=True))
+    os.replace(tmp, path)
+
+
+def _procgen_record(r) -> dict:
+    """The fields of a ProcgenResult kept in procgen_results.jsonl."""
+    return {
+        "iteration": r.iteration,
+        "student": r.student_name,
+        "scenario": r.scenario_id,
+        "persona": r.persona_name,
+        "questions": r.question_keys,
+        "num_questions": r.num_questions,
+        "rubric_pass": r.rubric_pass,
+        "pushback": r.pushback_detected,
+    }
 
 
-def run_full_cycle(
+async def _phase1(cycle_dir: Path, matrix_files: Optional[List[Path]], use_batch_api: bool) -> dict:
+    """PHASE 1: Binary rubric validation of the existing matrix dialogues."""
+
+    print("\n" + "-"*80)
+    print("PHASE 1: Binary Rubric Validation")
+    print("-"*80)
+
+    # Scores are cached by dialogue content, shared with standalone scorer
+    # runs, so repeated cycles only call the API for new or edited dialogues
+    scorer = await asyncio.to_thread(BinaryRubricScorer, cache_dir=SCORE_CACHE_DIR)
+
+    if matrix_files is not None:
+        print(f"Scoring dialogues in {MATRIX_DIR}...")
+        if use_batch_api:
+            scores = await scorer.score_files_batch_async(matrix_files, cycle_dir)
+        else:
+            scores = await scorer.score_files_async(matrix_files)
+
+        scorer.print_results_summary(scores)
+
+        # Save scores
+        scores_file = cycle_dir / "phase1_rubric_scores.json"
+        _dump_json(scores_file, {k: v.to_dict() for k, v in scores.items()})
+
+        print(f"\nScores saved to: {scores_file}")
+
+        pass_count = sum(s.pass_fail for s in scores.values())
+
+        return {
+            "status": "complete",
+            "output_file": str(scores_file),
+            "total_dialogues": len(scores),
+            "pass_count": pass_count,
+            "pass_rate": pass_count / len(scores) if scores else None,  # None = nothing scored
+        }
+    else:
+        print(f"Warning: {MATRIX_DIR} not found. Skipping phase 1.")
+        return {"status": "skipped", "reason": "No existing dialogues"}
+
+
+async def _phase2(cycle_dir: Path, matrix_files: Optional[List[Path]], use_batch_api: bool) -> dict:
+    """PHASE 2: Extend the existing matrix dialogues by one round."""
+
+    print("\n" + "-"*80)
+    print("PHASE 2: Dialogue Extension")
+    print("-"*80)
+
+    extender = await asyncio.to_thread(DialogueExtender)
+    output_dir = cycle_dir / "extended_dialogues"
+
+    if matrix_files is not None:
+        print(f"Extending dialogues from {MATRIX_DIR}...")
+        if use_batch_api:
+            extension_results = await extender.extend_files_batch_async(matrix_files, str(output_dir))
+        else:
+            extension_results = await extender.extend_files_async(matrix_files, str(output_dir))
+
+        successes = sum(1 for r in extension_results if r.get("status") == "success")
+        failures = sum(1 for r in extension_results if r.get("status") != "success")
+
+        print(f"\nExtension complete:")
+        print(f"  Success: {successes}/{len(extension_results)}")
+        print(f"  Failed: {failures}/{len(extension_results)}")
+
+        print(f"Extended dialogues saved to: {output_dir}")
+
+        return {
+            "status": "complete",
+            "output_dir": str(output_dir),
+            "total": len(extension_results),
+            "successes": successes,
+            "failures": failures,
+        }
+    else:
+        print(f"Warning: {MATRIX_DIR} not found. Skipping phase 2.")
+        return {"status": "skipped", "reason": "No existing dialogues"}
+
+
+async def _phase3(cycle_dir: Path, procgen_iterations: int) -> dict:
+    """PHASE 3: Procgen discovery over random personas."""
+
+    print("\n" + "-"*80)
+    print("PHASE 3: Procgen Discovery")
+    print("-"*80)
+
+    # Loads the question deck and persona definitions from disk
+    discovery = await asyncio.to_thread(ProcgenDiscovery)
+
+    print(f"Running procgen discovery ({procgen_iterations} iterations per pair)...")
+    print("(This will take a while - generating ~18-36 dialogues)\n")
+
+    procgen_dir = cycle_dir / "procgen_discovery"
+    procgen_dir.mkdir(parents=True, exist_ok=True)
+
+    # Each result is appended to disk and counted as it finishes; nothing
+    # holds the full set of dialogues in memory
+    aggregator = PatternAggregator()
+
+    with open(procgen_dir / "procgen_results.jsonl", "wb") as log:
+        def sink(result):
+            log.write(serialization.dumps(_procgen_record(result)) + b"\n")
+            log.flush()
+            aggregator.add(result)
+
+        await discovery.run_discovery_cycle_async(
+            iterations_per_pair=procgen_iterations,
+            verbose=True,
+            sink=sink,
+            keep_results=False,
+        )
+
+    print("\nAnalyzing procgen patterns...")
+    analysis = aggregator.analysis()
+
+    # Off the event loop, which phases 1-2 may still be using
+    await asyncio.to_thread(_dump_json, procgen_dir / "procgen_analysis.json", analysis)
+
+    # Print patterns
+    print("\n" + "-"*80)
+    print("DISCOVERED PATTERNS")
+    print("-"*80)
+
+    patterns = analysis.get("patterns", [])
+    patterns.sort(key=itemgetter("pass_rate"), reverse=True)
+
+    for pattern in patterns:
+        print(f"\n{pattern['pair']}: {pattern['pass_rate']:.0%} pass rate")
+        top_qs = pattern['top_questions'][:3]
+        print(f"  Top questions: {', '.join(top_qs) if top_qs else 'None'}")
+
+    print(f"\nProcgen results saved to: {procgen_dir}")
+
+    return {
+        "status": "complete",
+        "output_dir": str(procgen_dir),
+        "total_tests": aggregator.count,
+        "patterns": patterns,
+    }
+
+
+async def _gated_phase3(
+    phase1: asyncio.Future,
+    cycle_dir: Path,
+    procgen_iterations: int,
+    min_phase1_pass_rate: float,
+) -> dict:
+    """PHASE 3, run only if Phase 1's pass rate reaches min_phase1_pass_rate.
+
+    A skipped or failed Phase 1, or one that scored no dialogues, doesn't
+    block discovery.
+    """
+
+    try:
+        phase1_result = await phase1
+    except Exception:
+        phase1_result = {}
+
+    pass_rate = phase1_result.get("pass_rate")
+    if pass_rate is not None and pass_rate < min_phase1_pass_rate:
+        print(f"\nSkipping phase 3: phase 1 pass rate {pass_rate:.0%} < {min_phase1_pass_rate:.0%}")
+        return {"status": "skipped", "reason": "phase1 pass_rate below threshold"}
+
+    return await _phase3(cycle_dir, procgen_iterations)
+
+
+async def run_full_cycle_async(
     score_existing: bool = True,
     extend_dialogues: bool = True,
     run_procgen: bool = True,
     procgen_iterations: int = 5,
+    min_phase1_pass_rate: float = 0.0,
+    use_batch_api: bool = False,
 ):
-    """Run full discovery cycle."""
+    """Run full discovery cycle.
+
+    The phases don't read each other's output, so they run concurrently on
+    one event loop, each fanning out its own API calls (bounded by the
+    scorer/extender/discovery max_concurrency). Each phase builds its
+    scorer/extender/discovery in a worker thread, so their start-up file
+    loading overlaps instead of running back to back on the loop. A phase
+    that raises is recorded as an error without stopping the others.
+
+    With min_phase1_pass_rate > 0, Phase 3 waits for Phase 1 and is skipped
+    when the existing dialogues pass less often than that.
+
+    use_batch_api sends Phase 1 and 2 through the OpenAI Batch API: about
+    half the cost and no rate-limit pressure, but results can take up to 24h.
+    """
 
     print("\n" + "="*80)
     print("FULL DISCOVERY CYCLE")
     print("="*80)
 
-    cycle_dir = Path("data/discovery_cycles") / datetime.now().isoformat().replace(":", "-")
+    # One start time for both the directory name and the report
+    started = datetime.now().isoformat()
+
+    cycle_dir = Path("data/discovery_cycles") / started.replace(":", "-")
     cycle_dir.mkdir(parents=True, exist_ok=True)
 
     results = {
-        "cycle_started": datetime.now().isoformat(),
+        "cycle_started": started,
         "phases": {},
     }
 
-    # PHASE 1: Binary Rubric Validation
-    if score_existing:
-        print("\n" + "-"*80)
-        print("PHASE 1: Binary Rubric Validation")
-        print("-"*80)
-
-        scorer = BinaryRubricScorer()
-        existing_dialogues = Path("data/matrix")
-
-        if existing_dialogues.exists():
-            print(f"Scoring dialogues in {existing_dialogues}...")
-            scores = scorer.score_directory(str(existing_dialogues))
-
-            scorer.print_results_summary(scores)
-
-            # Save scores
-            scores_file = cycle_dir / "phase1_rubric_scores.json"
-            with open(scores_file, "w") as f:
-                json.dump({k: {
-                    "pass_fail": v.pass_fail,
-                    "asks_not_tells": v.asks_not_tells,
-                    "open_ended": v.open_ended,
-                    "agency_preserved": v.agency_preserved,
-                    "references_specific": v.references_specific,
-                    "emotional_aware": v.emotional_aware,
-                    "visible_progress": v.visible_progress,
-                    "pushback_safe": v.pushback_safe,
-                    "reasoning": v.reasoning,
-                    "confidence": v.confidence,
-                } for k, v in scores.items()}, f, indent=2)
-
-            results["phases"]["phase1_rubric"] = {
-                "status": "complete",
-                "output_file": str(scores_file),
-                "total_dialogues": len(scores),
-                "pass_count": sum(1 for s in scores.values() if s.pass_fail),
-                "pass_rate": sum(1 for s in scores.values() if s.pass_fail) / len(scores) if scores else 0,
-            }
-
-            print(f"\nScores saved to: {scores_file}")
-        else:
-            print(f"Warning: {existing_dialogues} not found. Skipping phase 1.")
-            results["phases"]["phase1_rubric"] = {"status": "skipped", "reason": "No existing dialogues"}
+    phases = {}
+    # Phases 1 and 2 read the same dialogues; list them once for both
+    matrix_files = iter_matrix_files(MATRIX_DIR) if MATRIX_DIR.is_dir() else None
 
-    # PHASE 2: Extend Dialogues
+    if score_existing:
+        phases["phase1_rubric"] = asyncio.ensure_future(_phase1(cycle_dir, matrix_files, use_batch_api))
     if extend_dialogues:
-        print("\n" + "-"*80)
-        print("PHASE 2: Dialogue Extension")
-        print("-"*80)
-
-        extender = DialogueExtender()
-        input_dir = "data/matrix"
-        output_dir = cycle_dir / "extended_dialogues"
-
-        if Path(input_dir).exists():
-            print(f"Extending dialogues from {input_dir}...")
-            extension_results = extender.extend_directory(input_dir, str(output_dir))
-
-            successes = sum(1 for r in extension_results if r.get("status") == "success")
-            failures = sum(1 for r in extension_results if r.get("status") != "success")
-
-            print(f"\nExtension complete:")
-            print(f"  Success: {successes}/{len(extension_results)}")
-            print(f"  Failed: {failures}/{len(extension_results)}")
-
-            results["phases"]["phase2_extend"] = {
-                "status": "complete",
-                "output_dir": str(output_dir),
-                "total": len(extension_results),
-                "successes": successes,
-                "failures": failures,
-            }
-
-            print(f"Extended dialogues saved to: {output_dir}")
-        else:
-            print(f"Warning: {input_dir} not found. Skipping phase 2.")
-            results["phases"]["phase2_extend"] = {"status": "skipped", "reason": "No existing dialogues"}
-
-    # PHASE 3: Procgen Discovery
+        phases["phase2_extend"] = _phase2(cycle_dir, matrix_files, use_batch_api)
     if run_procgen:
-        print("\n" + "-"*80)
-        print("PHASE 3: Procgen Discovery")
-        print("-"*80)
-
-        discovery = ProcgenDiscovery()
-
-        print(f"Running procgen discovery ({procgen_iterations} iterations per pair)...")
-        print("(This will take a while - generating ~18-36 dialogues)\n")
-
-        procgen_results = discovery.run_discovery_cycle(
-            iterations_per_pair=procgen_iterations,
-            verbose=True,
-        )
+        if score_existing and min_phase1_pass_rate > 0:
+            phases["phase3_procgen"] = _gated_phase3(
+                phases["phase1_rubric"], cycle_dir, procgen_iterations, min_phase1_pass_rate
+            )
+        else:
+            phases["phase3_procgen"] = _phase3(cycle_dir, procgen_iterations)
 
-        # Analyze patterns
-        print("\nAnalyzing procgen patterns...")
-        analysis = discovery.analyze_patterns(procgen_results)
-
-        # Save results
-        procgen_dir = cycle_dir / "procgen_discovery"
-        procgen_dir.mkdir(parents=True, exist_ok=True)
-
-        with open(procgen_dir / "procgen_results.json", "w") as f:
-            json.dump([{
-                "iteration": r.iteration,
-                "student": r.student_name,
-                "scenario": r.scenario_id,
-                "persona": r.persona_name,
-                "questions": r.question_keys,
-                "num_questions": r.num_questions,
-                "rubric_pass": r.rubric_pass,
-                "pushback": r.pushback_detected,
-            } for r in procgen_results], f, indent=2)
-
-        with open(procgen_dir / "procgen_analysis.json", "w") as f:
-            json.dump(analysis, f, indent=2)
-
-        # Print patterns
-        print("\n" + "-"*80)
-        print("DISCOVERED PATTERNS")
-        print("-"*80)
-
-        for pattern in sorted(analysis.get("patterns", []), key=lambda p: p["pass_rate"], reverse=True):
-            print(f"\n{pattern['pair']}: {pattern['pass_rate']:.0%} pass rate")
-            top_qs = pattern['top_questions'][:3]
-            print(f"  Top questions: {', '.join(top_qs) if top_qs else 'None'}")
-
-        results["phases"]["phase3_procgen"] = {
-            "status": "complete",
-            "output_dir": str(procgen_dir),
-            "total_tests": len(procgen_results),
-            "patterns": analysis.get("patterns", []),
-        }
+    outcomes = await asyncio.gather(*phases.values(), return_exceptions=True)
 
-        print(f"\nProcgen results saved to: {procgen_dir}")
+    for name, outcome in zip(phases, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"\n✗ {name} failed: {outcome}")
+            outcome = {"status": "error", "error": str(outcome)}
+        results["phases"][name] = outcome
 
     # FINAL REPORT
     print("\n" + "="*80)
@@ -181,8 +288,7 @@ def run_full_cycle(
     results["cycle_completed"] = datetime.now().isoformat()
 
     report_file = cycle_dir / "cycle_report.json"
-    with open(report_file, "w") as f:
-        json.dump(results, f, indent=2)
+    _dump_json(report_file, results)
 
     print(f"\nFull report saved to: {report_file}")
     print(f"Cycle directory: {cycle_dir}")
@@ -190,18 +296,40 @@ def run_full_cycle(
     return cycle_dir
 
 
+def run_full_cycle(
+    score_existing: bool = True,
+    extend_dialogues: bool = True,
+    run_procgen: bool = True,
+    procgen_iterations: int = 5,
+    min_phase1_pass_rate: float = 0.0,
+    use_batch_api: bool = False,
+):
+    """Run full discovery cycle."""
+    return asyncio.run(run_full_cycle_async(
+        score_existing, extend_dialogues, run_procgen, procgen_iterations,
+        min_phase1_pass_rate, use_batch_api,
+    ))
+
+
 if __name__ == "__main__":
     # Default: run all phases
     procgen_iters = 5  # Change this for longer runs
+    min_pass_rate = 0.0  # Skip procgen if phase 1 passes less often than this
+    use_batch_api = "--batch" in sys.argv
 
-    if len(sys.argv) > 1:
-        procgen_iters = int(sys.argv[1])
+    args = [arg for arg in sys.argv[1:] if arg != "--batch"]
+    if len(args) > 0:
+        procgen_iters = int(args[0])
+    if len(args) > 1:
+        min_pass_rate = float(args[1])
 
     cycle_dir = run_full_cycle(
         score_existing=True,
         extend_dialogues=True,
         run_procgen=True,
         procgen_iterations=procgen_iters,
+        min_phase1_pass_rate=min_pass_rate,
+        use_batch_api=use_batch_api,
     )
 
     print("\n✓ Ready for analysis.")
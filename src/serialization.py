@@ -0,0 +1,41 @@
+"""
+JSON serialization - Use orjson when installed, stdlib json otherwise.
+
+orjson parses and encodes several times faster than the stdlib and works
+on bytes: read files in binary mode, pass the bytes to loads(), and write
+the bytes returned by dumps().
+"""
+
+import json
+from dataclasses import asdict, is_dataclass
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+
+def _default(obj):
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes. Dataclasses are serialized as dicts.
+
+    Args:
+        obj: Value to serialize
+        indent: Pretty-print with 2-space indentation
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, default=_default).encode()
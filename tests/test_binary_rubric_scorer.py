@@ -0,0 +1,100 @@
+"""
+Tests for BinaryRubricScorer's embedding prefilter, against a fake API client.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import binary_rubric_scorer
+import serialization
+from binary_rubric_scorer import BinaryRubricScorer, HARD_STOP_KEYS, PASS_CRITERIA_KEYS
+
+
+def _rubric_reply(passed: bool) -> str:
+    return json.dumps({
+        "hard_stops": {key: False for key in HARD_STOP_KEYS},
+        "pass_criteria": {key: {"pass": passed, "reason": ""} for key in PASS_CRITERIA_KEYS},
+        "overall": {"pass": passed, "confidence": 0.9, "reasoning": "fake"},
+    })
+
+
+class FakeClient:
+    """Answers rubric calls by keyword and embeds along a PASS/FAIL axis."""
+
+    def __init__(self):
+        self.chat_calls = 0
+        self.embedding_calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+        self.embeddings = SimpleNamespace(create=self._embed)
+
+    async def _chat(self, **request):
+        self.chat_calls += 1
+        passed = "good" in request["messages"][-1]["content"]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=_rubric_reply(passed)))],
+            usage=None,
+        )
+
+    async def _embed(self, model, input):
+        self.embedding_calls += 1
+        vector = [1.0, 0.0] if "good" in input else [0.0, 1.0]
+        return SimpleNamespace(data=[SimpleNamespace(embedding=vector)])
+
+
+def _dialogue(i: int, quality: str) -> dict:
+    return {
+        "timestamp": f"t{i}",
+        "instructor": {"opening_diegetic": f"{quality} opening {i}"},
+        "student_response": {"diegetic": f"reply {i}", "non_diegetic": f"thinking {i}"},
+    }
+
+
+def _scorer(cache_dir) -> BinaryRubricScorer:
+    scorer = BinaryRubricScorer(api_key="test", cache_dir=str(cache_dir), prefilter=True)
+    fake = FakeClient()
+    scorer.client = scorer.chat.client = scorer.cache.client = fake
+    return scorer
+
+
+async def _score_all(scorer, dialogues):
+    return await asyncio.gather(*(scorer.score_dialogue(d) for d in dialogues))
+
+
+def test_prefilter_trains_on_embeddings_from_previous_run(tmp_path):
+    first = _scorer(tmp_path)
+    dialogues = [_dialogue(i, "good" if i % 2 else "bad") for i in range(60)]
+    asyncio.run(_score_all(first, dialogues))
+
+    # Untrained: every dialogue went to the LLM, its embedding stored with the score
+    assert first.client.chat_calls == 60
+    assert first.client.embedding_calls == 60
+    assert not first.prefilter.trained
+    assert len(first.cache.labeled_embeddings()) == 60
+
+    second = _scorer(tmp_path)
+    new_dialogues = [_dialogue(i, "good" if i % 2 else "bad") for i in range(60, 70)]
+    scores = asyncio.run(_score_all(second, new_dialogues))
+
+    assert second.prefilter.trained
+    assert second.prefiltered + second.client.chat_calls == 10
+    assert [s.pass_fail for s in scores] == [i % 2 == 1 for i in range(60, 70)]
+
+
+def test_batch_keeps_results_after_malformed_output(tmp_path, monkeypatch):
+    for i in range(4):
+        (tmp_path / f"matrix_{i}.json").write_bytes(serialization.dumps(_dialogue(i, "good")))
+
+    async def fake_run_batch(client, requests, input_path, poll_interval):
+        contents = {r["custom_id"]: _rubric_reply(True) for r in requests}
+        contents["matrix_1.json"] = contents["matrix_1.json"][:40]  # truncated
+        return contents
+
+    monkeypatch.setattr(binary_rubric_scorer, "run_batch", fake_run_batch)
+
+    scorer = BinaryRubricScorer(api_key="test", cache_dir=None)
+    log_path = tmp_path / "scores.jsonl"
+    results = asyncio.run(scorer.score_directory_batch_async(str(tmp_path), log_path=str(log_path)))
+
+    assert sorted(results) == ["matrix_0.json", "matrix_2.json", "matrix_3.json"]
+    assert len(log_path.read_text().splitlines()) == 3